@@ -0,0 +1,209 @@
+# app/aggregates.py
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from app.database import Database
+from app.archive import transaction_archive
+from app.reports import TransactionChunk, group_totals
+
+AGGREGATE_COLUMNS = 'transaction_id, source_account, destination_account, amount, currency, status'
+MAX_REPORTED_MISMATCHES = 100
+
+@dataclass
+class AccountTotals:
+    """Running totals for one account in one currency (amounts in paise)"""
+    inflow: int = 0
+    outflow: int = 0
+    processing_count: int = 0
+    processed_count: int = 0
+
+class _RebuildState:
+    """Tracks a rebuild in progress so concurrent updates are not lost on swap"""
+
+    def __init__(self):
+        # Every event recorded while the rebuild runs, in order
+        self.pending: List[Tuple[str, dict]] = []
+        # IDs the scan has read, and those it read as not yet PROCESSED
+        self.scanned: Set[str] = set()
+        self.scanned_processing: Set[str] = set()
+
+class AccountAggregates:
+    """
+    Per-account, per-currency running aggregates over the transactions table.
+
+    Updated incrementally by the webhook handler and the background processor,
+    so reads never touch the database.
+    """
+
+    def __init__(self):
+        self._totals: Dict[str, Dict[str, AccountTotals]] = {}
+        self._lock = threading.Lock()
+        self._rebuild: Optional[_RebuildState] = None
+
+    def _bucket(self, account_id: str, currency: str) -> AccountTotals:
+        currencies = self._totals.setdefault(account_id, {})
+        totals = currencies.get(currency)
+        if totals is None:
+            totals = currencies[currency] = AccountTotals()
+        return totals
+
+    def _apply_inserted(self, transaction: dict):
+        currency = transaction['currency']
+        amount = int(transaction['amount'])
+        source = self._bucket(transaction['source_account'], currency)
+        destination = self._bucket(transaction['destination_account'], currency)
+        source.outflow += amount
+        destination.inflow += amount
+
+        # A self-transfer is still a single transaction for the counts
+        for totals in ([source] if source is destination else [source, destination]):
+            if transaction['status'] == 'PROCESSED':
+                totals.processed_count += 1
+            else:
+                totals.processing_count += 1
+
+    def _apply_archived(self, chunk: TransactionChunk):
+        # Only PROCESSED rows are ever archived
+        for labels, count, amount in group_totals([chunk.source_account, chunk.currency], chunk.amount):
+            totals = self._bucket(*labels)
+            totals.outflow += amount
+            totals.processed_count += count
+
+        for labels, count, amount in group_totals([chunk.destination_account, chunk.currency], chunk.amount):
+            totals = self._bucket(*labels)
+            totals.inflow += amount
+            totals.processed_count += count
+
+        self_transfers = chunk.source_account == chunk.destination_account
+        if self_transfers.any():
+            columns = [chunk.source_account[self_transfers], chunk.currency[self_transfers]]
+            for labels, count, _ in group_totals(columns, chunk.amount[self_transfers]):
+                self._bucket(*labels).processed_count -= count
+
+    def _apply_processed(self, transaction: dict):
+        currency = transaction['currency']
+        accounts = {transaction['source_account'], transaction['destination_account']}
+        for account_id in accounts:
+            totals = self._bucket(account_id, currency)
+            totals.processing_count -= 1
+            totals.processed_count += 1
+
+    def _record(self, kind: str, transaction: dict):
+        with self._lock:
+            if kind == 'inserted':
+                self._apply_inserted(transaction)
+            else:
+                self._apply_processed(transaction)
+
+            # A page in flight may already have read the row, so keep every
+            # event and let the replay decide what the scan missed
+            if self._rebuild is not None:
+                self._rebuild.pending.append((kind, transaction))
+
+    def record_inserted(self, transaction: dict):
+        """Account for a newly inserted transaction row"""
+        self._record('inserted', transaction)
+
+    def record_processed(self, transaction: dict):
+        """Move a transaction from PROCESSING to PROCESSED"""
+        self._record('processed', transaction)
+
+    @staticmethod
+    def _replay(fresh: "AccountAggregates", state: _RebuildState):
+        """
+        Apply events recorded during the scan, skipping any whose effect the
+        scan already saw. Rows are committed before their event is recorded,
+        and a row is only processed after its insert event, so a scanned row
+        already reflects its insert, and a row scanned as PROCESSED its
+        completion too.
+        """
+        replayed_inserts: Set[str] = set()
+        for kind, transaction in state.pending:
+            transaction_id = transaction['transaction_id']
+            if kind == 'inserted':
+                if transaction_id not in state.scanned:
+                    fresh._apply_inserted(transaction)
+                    replayed_inserts.add(transaction_id)
+            elif transaction_id in state.scanned_processing or transaction_id in replayed_inserts:
+                fresh._apply_processed(transaction)
+
+    def get_account(self, account_id: str) -> Dict[str, AccountTotals]:
+        """Return a copy of the per-currency totals for an account"""
+        with self._lock:
+            currencies = self._totals.get(account_id, {})
+            return {currency: AccountTotals(**asdict(totals)) for currency, totals in currencies.items()}
+
+    def rebuild(self, page_size: int = 1000) -> dict:
+        """
+        Recompute all aggregates from the transactions table and the archive
+        and swap them in.
+
+        Returns a report of how the recomputed totals compare to the running ones.
+        """
+        with self._lock:
+            if self._rebuild is not None:
+                raise RuntimeError("Aggregate rebuild already in progress")
+            state = self._rebuild = _RebuildState()
+
+        try:
+            fresh = AccountAggregates()
+            scanned = 0
+            client = Database.get_client()
+            cursor = ""
+
+            while True:
+                result = client.table('transactions')\
+                    .select(AGGREGATE_COLUMNS)\
+                    .gt('transaction_id', cursor)\
+                    .order('transaction_id')\
+                    .limit(page_size)\
+                    .execute()
+
+                rows = result.data or []
+                for row in rows:
+                    fresh._apply_inserted(row)
+                    state.scanned.add(row['transaction_id'])
+                    if row['status'] != 'PROCESSED':
+                        state.scanned_processing.add(row['transaction_id'])
+                scanned += len(rows)
+
+                # A short page means the scan has reached the end of the table
+                if len(rows) < page_size:
+                    break
+                cursor = rows[-1]['transaction_id']
+
+            # Read the archive after the table, so a row archived mid-scan is
+            # either in the table scan or in a segment listed now; rows in both
+            # were archived but not yet deleted, and count once
+            table_ids = np.array(sorted(state.scanned), dtype=str)
+            for chunk in transaction_archive.iter_chunks():
+                unseen = ~np.isin(chunk.transaction_id, table_ids)
+                if not unseen.all():
+                    chunk = chunk.take(unseen)
+                fresh._apply_archived(chunk)
+                scanned += len(chunk)
+
+            with self._lock:
+                self._replay(fresh, state)
+
+                mismatched = sorted(
+                    account_id
+                    for account_id in set(self._totals) | set(fresh._totals)
+                    if self._totals.get(account_id) != fresh._totals.get(account_id)
+                )
+                self._totals = fresh._totals
+
+            return {
+                'accounts': len(fresh._totals),
+                'transactions': scanned,
+                'consistent': not mismatched,
+                'mismatched_count': len(mismatched),
+                'mismatched_accounts': mismatched[:MAX_REPORTED_MISMATCHES]
+            }
+        finally:
+            with self._lock:
+                self._rebuild = None
+
+# Process-wide aggregates shared by the routes and background tasks
+account_aggregates = AccountAggregates()
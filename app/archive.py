@@ -0,0 +1,322 @@
+# app/archive.py
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+from app.database import Database
+from app.reports import TransactionChunk, parse_timestamps, DB_PAGE_SIZE
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join("data", "archive"))
+INDEX_DIR = "index"
+# Segments are merged into one once a run leaves more than this many behind
+MAX_INDEX_SEGMENTS = int(os.getenv("ARCHIVE_MAX_INDEX_SEGMENTS", "32"))
+DEFAULT_OLDER_THAN_DAYS = 30
+DEFAULT_CHUNK_SIZE = 50000
+# Keeps the delete request URL well under PostgREST limits
+DELETE_BATCH_SIZE = 200
+# Rows per separately compressed group, so a lookup decodes one group, not the part
+ROW_GROUP_SIZE = 4096
+
+STRING_COLUMNS = ('transaction_id', 'source_account', 'destination_account', 'currency', 'status')
+TIMESTAMP_COLUMNS = ('created_at', 'processed_at', 'updated_at')
+
+def rows_to_columns(rows: List[dict]) -> Dict[str, np.ndarray]:
+    """Convert transaction rows into the archive's columnar layout"""
+    columns = {name: np.array([row[name] for row in rows], dtype=str) for name in STRING_COLUMNS}
+    columns['amount'] = np.fromiter((int(row['amount']) for row in rows), dtype=np.int64, count=len(rows))
+    for name in TIMESTAMP_COLUMNS:
+        columns[name] = parse_timestamps(row.get(name) for row in rows)
+    return columns
+
+ARCHIVE_COLUMNS = STRING_COLUMNS + ('amount',) + TIMESTAMP_COLUMNS
+
+def _group_key(name: str, group: int) -> str:
+    return f"{name}.{group}"
+
+def _read_part(path: str) -> Dict[str, np.ndarray]:
+    """Every row of a part, for full scans"""
+    with np.load(path) as part:
+        groups = len(part['group_first_ids'])
+        return {
+            name: np.concatenate([part[_group_key(name, group)] for group in range(groups)])
+            for name in ARCHIVE_COLUMNS
+        }
+
+# Part files are immutable once written, so caching by path is safe
+@lru_cache(maxsize=256)
+def _read_group_first_ids(path: str) -> np.ndarray:
+    with np.load(path) as part:
+        return part['group_first_ids']
+
+@lru_cache(maxsize=32)
+def _read_row_group(path: str, group: int) -> Dict[str, np.ndarray]:
+    with np.load(path) as part:
+        return {name: part[_group_key(name, group)] for name in ARCHIVE_COLUMNS}
+
+class IndexSegment(NamedTuple):
+    path: str
+    ids: np.ndarray
+    parts: np.ndarray
+    files: np.ndarray
+
+@lru_cache(maxsize=256)
+def _read_segment(path: str) -> IndexSegment:
+    # Segments are immutable once written; merging writes a new file
+    with np.load(path) as segment:
+        return IndexSegment(path, segment['ids'], segment['parts'], segment['files'])
+
+def _column_row(columns: Dict[str, np.ndarray], row: int) -> dict:
+    """Row `row` of the columnar layout as a transaction dict"""
+    transaction = {name: str(columns[name][row]) for name in STRING_COLUMNS}
+    transaction['amount'] = int(columns['amount'][row])
+    for name in TIMESTAMP_COLUMNS:
+        # NaT converts to None
+        transaction[name] = columns[name][row].item()
+    return transaction
+
+def _write_npz(path: str, **arrays):
+    """Write a compressed npz atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class TransactionArchive:
+    """
+    Cold storage for PROCESSED transactions.
+
+    Rows live in compressed columnar part files under date=YYYY-MM-DD
+    partitions (by created_at), each sorted by transaction_id and split into
+    row groups of ROW_GROUP_SIZE that are compressed separately. Each archiving
+    batch also writes an immutable index segment, a sorted ID array mapping
+    its transaction_ids to their part files; lookups binary search every
+    segment.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._segments: Optional[Tuple[int, List[IndexSegment]]] = None
+
+    @property
+    def index_dir(self) -> str:
+        return os.path.join(self.root, INDEX_DIR)
+
+    def _load_segments(self) -> List["IndexSegment"]:
+        """Return the index segments, re-listing when another process added or merged some"""
+        try:
+            mtime = os.stat(self.index_dir).st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        with self._lock:
+            if self._segments is None or self._segments[0] != mtime:
+                segments = []
+                for name in sorted(os.listdir(self.index_dir)):
+                    if not name.endswith(".npz"):
+                        continue
+                    try:
+                        segments.append(_read_segment(os.path.join(self.index_dir, name)))
+                    except FileNotFoundError:
+                        # Removed by a concurrent merge; the merged segment covers it
+                        continue
+                self._segments = (mtime, segments)
+            return self._segments[1]
+
+    def _find(self, transaction_id: str) -> Optional[str]:
+        """Relative path of the part file holding transaction_id, if archived"""
+        key = transaction_id.encode()
+        for segment in self._load_segments():
+            position = int(np.searchsorted(segment.ids, key))
+            if position < len(segment.ids) and segment.ids[position] == key:
+                return str(segment.files[segment.parts[position]])
+        return None
+
+    def contains(self, transaction_id: str) -> bool:
+        """Whether transaction_id has been archived, answered from the index alone"""
+        return self._find(transaction_id) is not None
+
+    def _archived_mask(self, transaction_ids: np.ndarray) -> np.ndarray:
+        keys = np.char.encode(transaction_ids)
+        mask = np.zeros(len(keys), dtype=bool)
+        for segment in self._load_segments():
+            mask |= np.isin(keys, segment.ids)
+        return mask
+
+    def lookup(self, transaction_id: str) -> Optional[dict]:
+        """Fetch an archived transaction row by ID, or None if it was never archived"""
+        relative_path = self._find(transaction_id)
+        if relative_path is None:
+            return None
+
+        path = os.path.join(self.root, relative_path)
+        group = int(np.searchsorted(_read_group_first_ids(path), transaction_id, side='right')) - 1
+        columns = _read_row_group(path, group)
+        return _column_row(columns, int(np.searchsorted(columns['transaction_id'], transaction_id)))
+
+    def iter_chunks(self) -> Iterator[TransactionChunk]:
+        """Stream every archived part as a TransactionChunk"""
+        files = [str(name) for segment in self._load_segments() for name in segment.files]
+        for name in files:
+            columns = _read_part(os.path.join(self.root, str(name)))
+            yield TransactionChunk(**{
+                field: columns[field]
+                for field in STRING_COLUMNS + ('amount', 'created_at')
+            })
+
+    def _write_partitions(self, columns: Dict[str, np.ndarray]) -> List[Tuple[str, np.ndarray]]:
+        """Write one part file per created_at date; returns (relative path, transaction IDs) pairs"""
+        written = []
+        # Sort in code point order so lookups can binary search the part
+        order = np.argsort(columns['transaction_id'], kind='stable')
+        columns = {name: values[order] for name, values in columns.items()}
+        days = columns['created_at'].astype('datetime64[D]')
+        stamp = time.time_ns()
+
+        for day in np.unique(days):
+            mask = days == day if not np.isnat(day) else np.isnat(days)
+            partition = f"date={np.datetime_as_string(day)}" if not np.isnat(day) else "date=unknown"
+            relative_path = os.path.join(partition, f"part-{stamp}.npz")
+            rows = {name: values[mask] for name, values in columns.items()}
+            starts = range(0, len(rows['transaction_id']), ROW_GROUP_SIZE)
+            _write_npz(
+                os.path.join(self.root, relative_path),
+                group_first_ids=rows['transaction_id'][list(starts)],
+                **{
+                    _group_key(name, group): values[start:start + ROW_GROUP_SIZE]
+                    for name, values in rows.items()
+                    for group, start in enumerate(starts)
+                }
+            )
+            written.append((relative_path, columns['transaction_id'][mask]))
+
+        return written
+
+    def _write_segment(self, written: List[Tuple[str, np.ndarray]]):
+        """Index only the parts just written, leaving existing segments untouched"""
+        ids = np.concatenate([np.char.encode(transaction_ids) for _, transaction_ids in written])
+        parts = np.concatenate([
+            np.full(len(transaction_ids), number, dtype=np.int32)
+            for number, (_, transaction_ids) in enumerate(written)
+        ])
+        order = np.argsort(ids, kind='stable')
+        _write_npz(
+            os.path.join(self.index_dir, f"segment-{time.time_ns()}.npz"),
+            ids=ids[order], parts=parts[order],
+            files=np.array([relative_path for relative_path, _ in written], dtype=str)
+        )
+
+    def _merge_segments(self):
+        """Fold every segment into one so lookups stay a handful of binary searches"""
+        segments = self._load_segments()
+        if len(segments) <= MAX_INDEX_SEGMENTS:
+            return
+
+        ids, parts, files = [], [], []
+        for segment in segments:
+            ids.append(segment.ids)
+            parts.append(segment.parts + len(files))
+            files.extend(str(name) for name in segment.files)
+
+        ids = np.concatenate(ids)
+        parts = np.concatenate(parts)
+        order = np.argsort(ids, kind='stable')
+        # The merged segment sorts after the ones it replaces, so readers never miss IDs
+        _write_npz(
+            os.path.join(self.index_dir, f"segment-{time.time_ns()}.npz"),
+            ids=ids[order], parts=parts[order], files=np.array(files, dtype=str)
+        )
+        for segment in segments:
+            os.remove(segment.path)
+        print(f"Merged {len(segments)} archive index segments")
+
+    def _archive_rows(self, client, rows: List[dict]) -> int:
+        columns = rows_to_columns(rows)
+        deletable = np.ones(len(rows), dtype=bool)
+
+        # Rows indexed by an earlier run that died before deleting them
+        already_archived = self._archived_mask(columns['transaction_id'])
+        for position in np.flatnonzero(already_archived):
+            archived = self.lookup(str(columns['transaction_id'][position]))
+            if archived != _column_row(columns, position):
+                # Keep the hot row rather than lose whichever copy is right
+                deletable[position] = False
+                print(f"Transaction {columns['transaction_id'][position]} differs from its archived copy, not deleting")
+
+        if (~already_archived).any():
+            fresh = {name: values[~already_archived] for name, values in columns.items()}
+            self._write_segment(self._write_partitions(fresh))
+
+        # Only drop rows from the hot table once they are durable in the archive
+        transaction_ids = [row['transaction_id'] for row, delete in zip(rows, deletable) if delete]
+        for start in range(0, len(transaction_ids), DELETE_BATCH_SIZE):
+            client.table('transactions')\
+                .delete()\
+                .in_('transaction_id', transaction_ids[start:start + DELETE_BATCH_SIZE])\
+                .execute()
+
+        return len(transaction_ids)
+
+    def archive_processed(self, older_than_days: int = DEFAULT_OLDER_THAN_DAYS,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+        """
+        Move PROCESSED transactions processed more than older_than_days ago
+        from the transactions table into the archive.
+        """
+        cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+        client = Database.get_client()
+        cursor = ""
+        rows: List[dict] = []
+        archived = 0
+
+        while True:
+            result = client.table('transactions')\
+                .select('*')\
+                .eq('status', 'PROCESSED')\
+                .lt('processed_at', cutoff)\
+                .gt('transaction_id', cursor)\
+                .order('transaction_id')\
+                .limit(DB_PAGE_SIZE)\
+                .execute()
+
+            page = result.data or []
+            rows.extend(page)
+            last_page = len(page) < DB_PAGE_SIZE
+
+            if rows and (len(rows) >= chunk_size or last_page):
+                archived += self._archive_rows(client, rows)
+                print(f"Archived {archived} transactions processed before {cutoff}")
+                rows = []
+
+            if last_page:
+                break
+            cursor = page[-1]['transaction_id']
+
+        self._merge_segments()
+        return {'archived': archived, 'cutoff': cutoff}
+
+# Process-wide archive used for read fallbacks
+transaction_archive = TransactionArchive()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Archive old PROCESSED transactions to compressed columnar files")
+    parser.add_argument("--older-than-days", type=int, default=DEFAULT_OLDER_THAN_DAYS,
+                        help="Archive transactions processed more than this many days ago")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows written per part file batch")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="Root directory of the archive")
+    args = parser.parse_args(argv)
+
+    summary = TransactionArchive(args.archive_dir).archive_processed(args.older_than_days, args.chunk_size)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
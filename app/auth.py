@@ -0,0 +1,20 @@
+# app/auth.py
+import hmac
+import os
+from typing import Optional
+from fastapi import Header, HTTPException, status
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check a token against ADMIN_TOKEN; admin access is off when it is unset"""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency for admin-only endpoints"""
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
+        )
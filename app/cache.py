@@ -0,0 +1,52 @@
+# app/cache.py
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+TRANSACTION_CACHE_SIZE = int(os.getenv("TRANSACTION_CACHE_SIZE", "10000"))
+USER_CHART_CACHE_SIZE = int(os.getenv("USER_CHART_CACHE_SIZE", "5000"))
+
+class LRUCache:
+    """Small thread-safe LRU cache for rows read from the database"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def keys(self) -> List[str]:
+        """Keys from least to most recently used"""
+        with self._lock:
+            return list(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+# PROCESSED transaction rows keyed by transaction_id
+transaction_cache = LRUCache(TRANSACTION_CACHE_SIZE)
+# {'chart_data', 'updated_at'} keyed by normalised email
+user_chart_cache = LRUCache(USER_CHART_CACHE_SIZE)
+
+def cache_transaction(transaction: dict):
+    """Cache a transaction row once it is final; PROCESSING rows would go stale"""
+    if transaction.get('status') == 'PROCESSED':
+        transaction_cache.set(transaction['transaction_id'], transaction)
@@ -0,0 +1,159 @@
+# app/encoding.py
+import gzip
+import os
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional, Tuple
+import msgpack
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Below this many bytes compression costs more than it saves
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Bodies this large are compressed off the event loop
+COMPRESSION_THREADPOOL_MIN_SIZE = int(os.getenv("COMPRESSION_THREADPOOL_MIN_SIZE", "65536"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Media type negotiated for the response of the request being handled
+_response_media_type: ContextVar[str] = ContextVar("response_media_type", default=JSON_MEDIA_TYPE)
+
+def _parse_header_values(header: Optional[str]) -> List[Tuple[str, float]]:
+    """Parse an Accept-style header into (value, q) pairs"""
+    values = []
+    for part in (header or "").split(","):
+        value, _, params = part.strip().partition(";")
+        if not value:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, raw = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        values.append((value.strip().lower(), quality))
+    return values
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Pick MessagePack only when the client explicitly prefers it over JSON"""
+    msgpack_quality = 0.0
+    json_quality = 0.0
+    for media_type, quality in _parse_header_values(accept):
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_quality = max(msgpack_quality, quality)
+        elif media_type == JSON_MEDIA_TYPE:
+            json_quality = max(json_quality, quality)
+
+    if msgpack_quality > 0 and msgpack_quality >= json_quality:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+def negotiate_content_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the supported coding with the highest q-value, with "*" standing in
+    for codings not listed. Ties go to brotli, then gzip; None means identity.
+    """
+    accepted = {coding: quality for coding, quality in _parse_header_values(accept_encoding)}
+    wildcard = accepted.get("*", 0.0)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    # max() keeps the first of equal candidates, so order is the tie-break
+    encoding = max(supported, key=lambda coding: accepted.get(coding, wildcard))
+    quality = accepted.get(encoding, wildcard)
+    if quality <= 0 or accepted.get("identity", 0.0) > quality:
+        return None
+    return encoding
+
+def encode_payload(content: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(content, use_bin_type=True)
+    return JSONResponse(content).body
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+class NegotiatedResponse(JSONResponse):
+    """JSON response that renders as MessagePack when the client asked for it"""
+
+    def render(self, content: Any) -> bytes:
+        media_type = _response_media_type.get()
+        self.media_type = media_type
+        if media_type == MSGPACK_MEDIA_TYPE:
+            return encode_payload(content, media_type)
+        return super().render(content)
+
+async def _decode_msgpack_body(request: Request) -> Request:
+    """Present a MessagePack request body to FastAPI as already-parsed JSON"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in MSGPACK_MEDIA_TYPES:
+        return request
+
+    body = await request.body()
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid MessagePack body"
+        )
+
+    headers = [(name, value) for name, value in request.scope["headers"] if name != b"content-type"]
+    headers.append((b"content-type", JSON_MEDIA_TYPE.encode()))
+    decoded = Request({**request.scope, "headers": headers}, request.receive)
+    decoded._body = body
+    decoded._json = payload
+    return decoded
+
+async def _compress_response(response: Response, accept_encoding: Optional[str]) -> Response:
+    body = getattr(response, "body", None)
+    if body is None or "content-encoding" in response.headers:
+        return response
+
+    response.headers.add_vary_header("Accept")
+    response.headers.add_vary_header("Accept-Encoding")
+
+    encoding = negotiate_content_encoding(accept_encoding)
+    if encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+        return response
+
+    if len(body) >= COMPRESSION_THREADPOOL_MIN_SIZE:
+        response.body = await run_in_threadpool(compress, body, encoding)
+    else:
+        response.body = compress(body, encoding)
+    response.headers["content-encoding"] = encoding
+    response.headers["content-length"] = str(len(response.body))
+    return response
+
+class NegotiatedRoute(APIRoute):
+    """
+    Route that accepts MessagePack request bodies and negotiates the response:
+    MessagePack or JSON from Accept, brotli or gzip from Accept-Encoding.
+    """
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+
+        async def negotiated_route_handler(request: Request) -> Response:
+            request = await _decode_msgpack_body(request)
+            token = _response_media_type.set(negotiate_media_type(request.headers.get("accept")))
+            try:
+                response = await route_handler(request)
+            finally:
+                _response_media_type.reset(token)
+            return await _compress_response(response, request.headers.get("accept-encoding"))
+
+        return negotiated_route_handler
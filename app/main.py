@@ -1,7 +1,11 @@
 # app/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import transactions, user_charts, webhooks
+from app.routes import transactions, user_charts, webhooks, accounts, reports, admin
+from app.profiling import loop_lag_monitor, ProfileRequestMiddleware
+from app.notifications import notification_dispatcher
+from app.warmup import warmup_manager
 import os
 
 app = FastAPI(
@@ -21,10 +25,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request profiling, triggered by the X-Profile header
+app.add_middleware(ProfileRequestMiddleware)
+
 # Include routers
 app.include_router(transactions.router, tags=["Transactions"])
 app.include_router(user_charts.router, prefix="/api", tags=["User Charts"])
 app.include_router(webhooks.router, prefix="/api/v1", tags=["Webhooks"])
+app.include_router(accounts.router, tags=["Accounts"])
+app.include_router(reports.router, tags=["Reports"])
+app.include_router(admin.router, tags=["Admin"])
 
 @app.get("/")
 async def root():
@@ -43,13 +53,28 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/api/ready")
+async def readiness_check():
+    warmup_status = warmup_manager.status()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if warmup_status["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "READY" if warmup_status["ready"] else "WARMING_UP", **warmup_status}
+    )
+
 @app.on_event("startup")
 async def startup_event():
     print("Starting WalnutFolks Transaction API...")
+    loop_lag_monitor.start()
+    await notification_dispatcher.start()
+    # Warm caches and account aggregates in the background; /api/ready reports progress
+    warmup_manager.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Shutting down WalnutFolks Transaction API...")
+    loop_lag_monitor.stop()
+    await warmup_manager.stop()
+    await notification_dispatcher.stop()
 
 if __name__ == "__main__":
     import uvicorn
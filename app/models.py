@@ -51,6 +51,51 @@ class UserChartResponse(BaseModel):
     message: Optional[str] = None
     lastUpdated: Optional[datetime] = None
 
+class CurrencySummary(BaseModel):
+    currency: str
+    inflow: float
+    outflow: float
+    net: float
+    processing_count: int
+    processed_count: int
+
+class AccountSummaryResponse(BaseModel):
+    account_id: str
+    currencies: List[CurrencySummary]
+
+class AggregateRebuildResponse(BaseModel):
+    accounts: int
+    transactions: int
+    consistent: bool
+    mismatched_count: int
+    mismatched_accounts: List[str]
+
+class ReconciliationGroup(BaseModel):
+    currency: str
+    status: Optional[str] = None
+    hour: Optional[str] = None
+    source_account: Optional[str] = None
+    destination_account: Optional[str] = None
+    count: int
+    amount: float
+
+class StuckTransactions(BaseModel):
+    sla_minutes: int
+    count: int
+    transaction_ids: List[str]
+    oldest_created_at: Optional[datetime] = None
+
+class ReconciliationReportResponse(BaseModel):
+    generated_at: datetime
+    total_count: int
+    by_currency: List[ReconciliationGroup]
+    by_status: List[ReconciliationGroup]
+    by_hour: List[ReconciliationGroup]
+    by_account_pair: List[ReconciliationGroup]
+    stuck: StuckTransactions
+    truncated: Dict[str, int] = {}
+    approximate: List[str] = []
+
 class ErrorResponse(BaseModel):
     error: str
     detail: Optional[str] = None
\ No newline at end of file
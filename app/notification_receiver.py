@@ -0,0 +1,53 @@
+# app/notification_receiver.py
+"""
+Local stand-in for a merchant webhook, for exercising outbound notifications.
+
+Run with: python -m app.notification_receiver --port 9000
+and point NOTIFICATION_DESTINATIONS at http://127.0.0.1:9000/notifications
+"""
+import argparse
+import os
+import random
+from typing import Any, Dict, List, Union
+from fastapi import FastAPI, Response, status
+
+# Fraction of requests answered with 503, to exercise retries
+FAILURE_RATE = float(os.getenv("RECEIVER_FAILURE_RATE", "0"))
+
+app = FastAPI(title="Notification Receiver Stub")
+
+received: List[Dict[str, Any]] = []
+stats = {"requests": 0, "batches": 0, "rejected": 0}
+
+@app.post("/notifications")
+async def receive_notifications(payload: Union[List[Dict[str, Any]], Dict[str, Any]]):
+    stats["requests"] += 1
+
+    if random.random() < FAILURE_RATE:
+        stats["rejected"] += 1
+        return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    if isinstance(payload, list):
+        stats["batches"] += 1
+        received.extend(payload)
+    else:
+        received.append(payload)
+
+    return {"received": len(payload) if isinstance(payload, list) else 1}
+
+@app.get("/notifications")
+async def list_notifications():
+    return {"count": len(received), **stats, "notifications": received}
+
+@app.delete("/notifications")
+async def clear_notifications():
+    received.clear()
+    stats.update(requests=0, batches=0, rejected=0)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Run the notification receiver stub")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
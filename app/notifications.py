@@ -0,0 +1,308 @@
+# app/notifications.py
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+import httpx
+
+NOTIFICATION_DESTINATIONS = os.getenv("NOTIFICATION_DESTINATIONS", "{}")
+DEAD_LETTER_PATH = os.getenv("NOTIFICATION_DEAD_LETTER_PATH", os.path.join("data", "notification_dead_letters.jsonl"))
+
+MAX_CONNECTIONS = 100
+REQUEST_TIMEOUT_SECONDS = 10.0
+MAX_QUEUE_SIZE = 10000
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+# Client errors that are worth retrying; any other 4xx goes straight to dead letters
+RETRYABLE_CLIENT_ERRORS = {408, 425, 429}
+
+@dataclass
+class Destination:
+    """A merchant endpoint that is notified about one account's transactions"""
+    account_id: str
+    url: str
+    batch: bool = False
+    batch_size: int = 50
+    batch_wait_ms: int = 50
+    max_concurrency: int = 4
+
+@dataclass
+class DestinationMetrics:
+    enqueued: int = 0
+    delivered: int = 0
+    dead_lettered: int = 0
+    retries: int = 0
+    requests: int = 0
+    batches: int = 0
+    bytes_sent: int = 0
+    latency_ms_total: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "dead_lettered": self.dead_lettered,
+            "retries": self.retries,
+            "requests": self.requests,
+            "batches": self.batches,
+            "bytes_sent": self.bytes_sent,
+            "avg_latency_ms": round(self.latency_ms_total / self.requests, 1) if self.requests else None,
+            "delivered_per_second": round(self.delivered / elapsed, 2)
+        }
+
+def parse_destination(account_id: str, options: dict) -> Destination:
+    """Build a Destination from one configuration entry, raising ValueError if it is unusable"""
+    if not isinstance(options, dict):
+        raise ValueError("expected an object of destination options")
+    try:
+        destination = Destination(account_id=account_id, **options)
+    except TypeError as e:
+        raise ValueError(str(e))
+
+    if not isinstance(destination.url, str) or not destination.url.startswith(("http://", "https://")):
+        raise ValueError("url must be an http(s) URL")
+    if not isinstance(destination.batch, bool):
+        raise ValueError("batch must be true or false")
+    for name in ("batch_size", "max_concurrency"):
+        value = getattr(destination, name)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"{name} must be a positive integer")
+    if not isinstance(destination.batch_wait_ms, (int, float)) or destination.batch_wait_ms < 0:
+        raise ValueError("batch_wait_ms must be a non-negative number")
+    return destination
+
+def load_destinations(config: str = NOTIFICATION_DESTINATIONS) -> Dict[str, Destination]:
+    """
+    Parse {"<account_id>": {"url": ..., "batch": ...}, ...} from configuration.
+    Invalid entries are logged and skipped so they cannot stop the app starting.
+    """
+    try:
+        entries = json.loads(config or "{}")
+    except ValueError as e:
+        print(f"Invalid NOTIFICATION_DESTINATIONS, notifications disabled: {e}")
+        return {}
+    if not isinstance(entries, dict):
+        print("Invalid NOTIFICATION_DESTINATIONS, notifications disabled: expected an object keyed by account ID")
+        return {}
+
+    destinations = {}
+    for account_id, options in entries.items():
+        try:
+            destinations[account_id] = parse_destination(account_id, options)
+        except ValueError as e:
+            print(f"Skipping notification destination for {account_id}: {e}")
+    return destinations
+
+def build_notification(transaction: dict) -> dict:
+    return {
+        "event": "transaction.processed",
+        "transaction_id": transaction["transaction_id"],
+        "source_account": transaction["source_account"],
+        "destination_account": transaction["destination_account"],
+        "amount": transaction["amount"] / 100.0,  # Convert back from cents
+        "currency": transaction["currency"],
+        "status": transaction["status"],
+        "processed_at": transaction.get("processed_at")
+    }
+
+class NotificationDispatcher:
+    """
+    Delivers transaction notifications to merchant webhooks.
+
+    Each destination has its own queue and worker. Deliveries share one pooled
+    HTTP client, are capped per destination by a semaphore, are batched when
+    the destination accepts arrays, and are retried with exponential backoff
+    before landing in a JSONL dead-letter file.
+    """
+
+    def __init__(self, destinations: Dict[str, Destination], dead_letter_path: str = DEAD_LETTER_PATH,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.destinations = destinations
+        self.dead_letter_path = dead_letter_path
+        # Overrides the network transport, e.g. an ASGI app in tests
+        self.transport = transport
+        self.metrics: Dict[str, DestinationMetrics] = {account_id: DestinationMetrics() for account_id in destinations}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._deliveries: set = set()
+        # Dead-letter writes are tracked so stop() can wait for them
+        self._dead_letter_writes: set = set()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        if self._client is not None or not self.destinations:
+            return
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            transport=self.transport
+        )
+        for account_id, destination in self.destinations.items():
+            queue = self._queues[account_id] = asyncio.Queue(maxsize=MAX_QUEUE_SIZE)
+            self._workers.append(asyncio.create_task(self._worker(destination, queue)))
+        print(f"Notification dispatcher started for {len(self.destinations)} destinations")
+
+    async def stop(self):
+        for task in self._workers + list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._deliveries, return_exceptions=True)
+        self._workers = []
+
+        # Keep anything still queued rather than dropping it on shutdown
+        for account_id, queue in self._queues.items():
+            pending = []
+            while not queue.empty():
+                pending.append(queue.get_nowait())
+            if pending:
+                await self._dead_letter(self.destinations[account_id], pending, "dispatcher stopped")
+        await asyncio.gather(*self._dead_letter_writes, return_exceptions=True)
+
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def enqueue(self, transaction: dict):
+        """Queue a notification for every configured account on the transaction"""
+        if self._client is None:
+            return
+
+        notification = build_notification(transaction)
+        for account_id in {transaction["source_account"], transaction["destination_account"]}:
+            queue = self._queues.get(account_id)
+            if queue is None:
+                continue
+            self.metrics[account_id].enqueued += 1
+            try:
+                queue.put_nowait(notification)
+            except asyncio.QueueFull:
+                self._schedule_dead_letter(self.destinations[account_id], [notification], "queue full")
+
+    async def _worker(self, destination: Destination, queue: asyncio.Queue):
+        semaphore = asyncio.Semaphore(destination.max_concurrency)
+
+        def delivery_done(task: asyncio.Task):
+            semaphore.release()
+            self._deliveries.discard(task)
+
+        while True:
+            notifications = []
+            try:
+                notifications.append(await queue.get())
+
+                if destination.batch:
+                    deadline = time.monotonic() + destination.batch_wait_ms / 1000.0
+                    while len(notifications) < destination.batch_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            notifications.append(await asyncio.wait_for(queue.get(), remaining))
+                        except asyncio.TimeoutError:
+                            break
+
+                await semaphore.acquire()
+            except asyncio.CancelledError:
+                if notifications:
+                    await self._dead_letter(destination, notifications, "dispatcher stopped")
+                raise
+
+            task = asyncio.create_task(self._deliver(destination, notifications))
+            self._deliveries.add(task)
+            task.add_done_callback(delivery_done)
+
+    async def _deliver(self, destination: Destination, notifications: List[dict]):
+        try:
+            error = await self._attempt_delivery(destination, notifications)
+        except asyncio.CancelledError:
+            await self._dead_letter(destination, notifications, "dispatcher stopped")
+            raise
+
+        if error is not None:
+            # Shielded so stopping mid-write cannot lose the record
+            await asyncio.shield(self._schedule_dead_letter(destination, notifications, error))
+
+    async def _attempt_delivery(self, destination: Destination, notifications: List[dict]) -> Optional[str]:
+        """POST with retries; returns None on success or the last error"""
+        metrics = self.metrics[destination.account_id]
+        payload = notifications if destination.batch else notifications[0]
+        body = json.dumps(payload).encode()
+        error = None
+
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                metrics.retries += 1
+                backoff = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+                await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+
+            started = time.monotonic()
+            try:
+                response = await self._client.post(
+                    destination.url,
+                    content=body,
+                    headers={"Content-Type": "application/json"}
+                )
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+            finally:
+                metrics.requests += 1
+                metrics.bytes_sent += len(body)
+                metrics.latency_ms_total += (time.monotonic() - started) * 1000
+
+            if response.is_success:
+                metrics.delivered += len(notifications)
+                if destination.batch:
+                    metrics.batches += 1
+                return None
+
+            error = f"HTTP {response.status_code}"
+            if response.status_code < 500 and response.status_code not in RETRYABLE_CLIENT_ERRORS:
+                break
+
+        return error
+
+    def _schedule_dead_letter(self, destination: Destination, notifications: List[dict], error: str) -> asyncio.Task:
+        task = asyncio.create_task(self._dead_letter(destination, notifications, error))
+        self._dead_letter_writes.add(task)
+        task.add_done_callback(self._dead_letter_writes.discard)
+        return task
+
+    async def _dead_letter(self, destination: Destination, notifications: List[dict], error: str):
+        self.metrics[destination.account_id].dead_lettered += len(notifications)
+        print(f"Dead-lettering {len(notifications)} notifications for {destination.account_id}: {error}")
+
+        record = json.dumps({
+            "account_id": destination.account_id,
+            "url": destination.url,
+            "error": error,
+            "failed_at": datetime.utcnow().isoformat() + "Z",
+            "notifications": notifications
+        })
+        try:
+            await asyncio.to_thread(self._append_dead_letter, record)
+        except Exception as e:
+            print(f"Failed to write dead letter: {e}")
+
+    def _append_dead_letter(self, record: str):
+        os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+        with open(self.dead_letter_path, "a") as f:
+            f.write(record + "\n")
+
+    def metrics_snapshot(self) -> dict:
+        return {
+            account_id: {
+                **metrics.to_dict(),
+                "queued": self._queues[account_id].qsize() if account_id in self._queues else 0
+            }
+            for account_id, metrics in self.metrics.items()
+        }
+
+# Process-wide dispatcher, started and stopped with the app
+notification_dispatcher = NotificationDispatcher(load_destinations())
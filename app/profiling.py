@@ -0,0 +1,230 @@
+# app/profiling.py
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter, OrderedDict
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.auth import is_admin_token
+
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+MAX_REQUEST_PROFILES = 20
+PROFILE_REQUEST_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+LOOP_LAG_THRESHOLD_MS = int(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))
+LOOP_LAG_CHECK_INTERVAL_MS = 20
+
+def _frame_label(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+def _collapse_stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler that snapshots every thread's stack from a
+    background thread, producing folded stacks (flamegraph.pl / speedscope).
+    """
+
+    def __init__(self, interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.samples: Counter = Counter()
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.samples[_collapse_stack(frame)] += 1
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.time()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def summary(self) -> dict:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "samples": sum(self.samples.values()),
+            "distinct_stacks": len(self.samples)
+        }
+
+class ProfilerSession:
+    """Admin-triggered profiling run that stops itself after a fixed duration"""
+
+    def __init__(self):
+        self.profiler: Optional[SamplingProfiler] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def running(self) -> bool:
+        return self.profiler is not None and self.profiler.running
+
+    def start(self, seconds: float, interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS) -> dict:
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.profiler = SamplingProfiler(interval_ms)
+        self.profiler.start()
+        self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+        print(f"Sampling profiler started for {seconds}s")
+        return self.profiler.summary()
+
+    def stop(self) -> Optional[dict]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.running:
+            return self.profiler.summary() if self.profiler else None
+        self.profiler.stop()
+        print(f"Sampling profiler stopped after {self.profiler.summary()['samples']} samples")
+        return self.profiler.summary()
+
+profiler_session = ProfilerSession()
+
+# Most recent per-request profiles, keyed by the X-Profile-Id response header
+request_profiles: "OrderedDict[str, SamplingProfiler]" = OrderedDict()
+
+class ProfileRequestMiddleware:
+    """
+    Profile a single request when it carries X-Profile: 1 and a valid admin
+    token. Samples cover all threads, so concurrent requests show up too.
+    The profile ends once the response body is sent. Plain ASGI so that every
+    other request passes straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_REQUEST_HEADER) != "1" or not is_admin_token(headers.get("x-admin-token")):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        profiler = SamplingProfiler()
+
+        def finish():
+            # Background tasks run after the response, so they are not profiled
+            if not profiler.running:
+                return
+            profiler.stop()
+            request_profiles[profile_id] = profiler
+            while len(request_profiles) > MAX_REQUEST_PROFILES:
+                request_profiles.popitem(last=False)
+
+        async def send_with_profile_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile_id
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            # The app failed or never finished its response
+            finish()
+
+class EventLoopLagMonitor:
+    """
+    Detects a blocked event loop. A coroutine heartbeats on the loop; a
+    watchdog thread notices when the heartbeat goes stale and logs the loop
+    thread's stack while it is still blocked.
+    """
+
+    def __init__(self, threshold_ms: float = LOOP_LAG_THRESHOLD_MS,
+                 check_interval_ms: float = LOOP_LAG_CHECK_INTERVAL_MS):
+        self.threshold = threshold_ms / 1000.0
+        self.check_interval = check_interval_ms / 1000.0
+        self.max_lag_ms = 0.0
+        self.blocked_count = 0
+        self._last_beat = time.monotonic()
+        self._beats = 0
+        self._reported_beat = -1
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    async def _heartbeat(self):
+        while True:
+            before = time.monotonic()
+            self._last_beat = before
+            self._beats += 1
+            await asyncio.sleep(self.check_interval)
+            lag_ms = (time.monotonic() - before - self.check_interval) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def _watch(self):
+        while not self._stop.wait(self.check_interval):
+            stalled = time.monotonic() - self._last_beat - self.check_interval
+            if stalled < self.threshold or self._reported_beat == self._beats:
+                continue
+
+            # Report each stall once, with the stack that is blocking the loop
+            self._reported_beat = self._beats
+            self.blocked_count += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>\n"
+            print(f"Event loop blocked for {stalled * 1000:.0f}ms, loop thread stack:\n{stack}", end="")
+
+    def start(self):
+        if self.threshold <= 0 or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "blocked_count": self.blocked_count
+        }
+
+loop_lag_monitor = EventLoopLagMonitor()
@@ -0,0 +1,422 @@
+# app/reports.py
+import argparse
+import csv
+import json
+import os
+from itertools import chain
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from app.database import Database
+
+REPORT_COLUMNS = 'transaction_id, source_account, destination_account, amount, currency, status, created_at'
+DEFAULT_CHUNK_SIZE = 50000
+DEFAULT_SLA_MINUTES = 5
+# PostgREST caps rows per request, so chunks are assembled from several pages
+DB_PAGE_SIZE = 1000
+MAX_STUCK_REPORTED = 1000
+# Largest groups kept per dimension by the API; the CLI reports every group
+DEFAULT_MAX_GROUPS = 1000
+# Groups held in memory per dimension; past this only the largest are kept
+DEFAULT_MAX_TRACKED_GROUPS = int(os.getenv("REPORT_MAX_TRACKED_GROUPS", "1000000"))
+# Chunk-level groups buffered before they are merged into the running totals
+MIN_MERGE_ROWS = 100000
+
+def _split_utc_offset(value: str) -> Tuple[str, int]:
+    """Split an ISO-8601 timestamp into its local part and its UTC offset in minutes"""
+    value = value.replace(' ', 'T')
+    if value.endswith('Z'):
+        return value[:-1], 0
+
+    position = max(value.rfind('+'), value.rfind('-'))
+    if position <= 18:
+        # No offset: the timestamp is already UTC
+        return value, 0
+
+    offset = value[position + 1:].replace(':', '')
+    if len(offset) not in (2, 4) or not offset.isdigit():
+        raise ValueError(f"Invalid UTC offset in timestamp: {value}")
+    minutes = int(offset[:2]) * 60 + int(offset[2:] or 0)
+    return value[:position], -minutes if value[position] == '-' else minutes
+
+def parse_timestamps(values: Iterable[Optional[str]]) -> np.ndarray:
+    """Parse ISO-8601 timestamps into UTC datetime64[us], with NaT for missing values"""
+    local_times = []
+    offsets = []
+    for value in values:
+        local_time, offset = _split_utc_offset(value) if value else ('NaT', 0)
+        local_times.append(local_time)
+        offsets.append(offset)
+
+    return np.array(local_times, dtype='datetime64[us]') - np.array(offsets, dtype='timedelta64[m]')
+
+class TransactionChunk:
+    """
+    A fixed-size batch of transactions held as columnar NumPy arrays.
+    Amounts are int64 paise and timestamps are datetime64 (UTC).
+    """
+
+    def __init__(self, transaction_id: np.ndarray, source_account: np.ndarray,
+                 destination_account: np.ndarray, amount: np.ndarray,
+                 currency: np.ndarray, status: np.ndarray, created_at: np.ndarray):
+        self.transaction_id = transaction_id
+        self.source_account = source_account
+        self.destination_account = destination_account
+        self.amount = amount
+        self.currency = currency
+        self.status = status
+        self.created_at = created_at
+
+    @classmethod
+    def from_rows(cls, rows: List[dict]) -> "TransactionChunk":
+        return cls(
+            transaction_id=np.array([row['transaction_id'] for row in rows], dtype=str),
+            source_account=np.array([row['source_account'] for row in rows], dtype=str),
+            destination_account=np.array([row['destination_account'] for row in rows], dtype=str),
+            amount=np.fromiter((int(row['amount']) for row in rows), dtype=np.int64, count=len(rows)),
+            currency=np.array([row['currency'] for row in rows], dtype=str),
+            status=np.array([row['status'] for row in rows], dtype=str),
+            created_at=parse_timestamps(row['created_at'] for row in rows)
+        )
+
+    def take(self, mask: np.ndarray) -> "TransactionChunk":
+        """The rows selected by a boolean mask or index array"""
+        return TransactionChunk(
+            transaction_id=self.transaction_id[mask],
+            source_account=self.source_account[mask],
+            destination_account=self.destination_account[mask],
+            amount=self.amount[mask],
+            currency=self.currency[mask],
+            status=self.status[mask],
+            created_at=self.created_at[mask]
+        )
+
+    @property
+    def hour(self) -> np.ndarray:
+        return self.created_at.astype('datetime64[h]')
+
+    def __len__(self) -> int:
+        return len(self.transaction_id)
+
+def iter_database_chunks(chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[TransactionChunk]:
+    """Stream the transactions table in transaction_id order, one chunk at a time"""
+    client = Database.get_client()
+    cursor = ""
+    rows: List[dict] = []
+
+    while True:
+        result = client.table('transactions')\
+            .select(REPORT_COLUMNS)\
+            .gt('transaction_id', cursor)\
+            .order('transaction_id')\
+            .limit(DB_PAGE_SIZE)\
+            .execute()
+
+        page = result.data or []
+        rows.extend(page)
+
+        if len(rows) >= chunk_size or len(page) < DB_PAGE_SIZE:
+            if rows:
+                yield TransactionChunk.from_rows(rows)
+            rows = []
+
+        if len(page) < DB_PAGE_SIZE:
+            return
+        cursor = page[-1]['transaction_id']
+
+def iter_csv_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[TransactionChunk]:
+    """Stream a CSV export of the transactions table, one chunk at a time"""
+    with open(path, newline='') as export:
+        rows: List[dict] = []
+        for row in csv.DictReader(export):
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield TransactionChunk.from_rows(rows)
+                rows = []
+        if rows:
+            yield TransactionChunk.from_rows(rows)
+
+def _label(value) -> str:
+    if isinstance(value, np.datetime64):
+        return np.datetime_as_string(value)
+    return str(value)
+
+def _hash_weights(width: int) -> np.ndarray:
+    # splitmix64 of each character position, forced odd
+    z = np.arange(1, width + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return (z ^ (z >> np.uint64(31))) | np.uint64(1)
+
+def _hash_column(values: np.ndarray) -> np.ndarray:
+    """64-bit hash per element; trailing padding adds nothing, so string widths may differ"""
+    values = np.ascontiguousarray(values)
+    if values.dtype.kind in 'US':
+        unit = np.uint32 if values.dtype.kind == 'U' else np.uint8
+        characters = values.view(unit).reshape(len(values), -1)
+        return (characters.astype(np.uint64) * _hash_weights(characters.shape[1])).sum(axis=1, dtype=np.uint64)
+    return values.view(np.int64).astype(np.uint64)
+
+def hash_keys(columns: List[np.ndarray]) -> np.ndarray:
+    """Combine per-column hashes into one uint64 group key"""
+    key = np.zeros(len(columns[0]), dtype=np.uint64)
+    for values in columns:
+        key = key * np.uint64(0x100000001B3) + _hash_column(values)
+        key ^= key >> np.uint64(29)
+    return key
+
+def _exact_group_starts(columns: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    # NaT never compares equal, so timestamps are grouped by their integer value
+    keys = [values.view(np.int64) if values.dtype.kind == 'M' else values for values in columns]
+    order = np.lexsort(keys[::-1])
+    changed = np.zeros(len(order), dtype=bool)
+    changed[0] = True
+    for values in keys:
+        ordered = values[order]
+        changed[1:] |= ordered[1:] != ordered[:-1]
+    return order, np.flatnonzero(changed)
+
+def reduce_groups(columns: List[np.ndarray], counts: np.ndarray, amounts: np.ndarray,
+                  hashes: Optional[np.ndarray] = None
+                  ) -> Tuple[List[np.ndarray], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorised group-by over one or more key columns, summing counts and
+    amounts per distinct combination of keys. Rows are grouped by sorting
+    their hash_keys; the keys are then compared exactly, and a hash collision
+    falls back to sorting the key columns themselves.
+
+    Returns (key columns, counts, amounts, hashes) with one entry per group.
+    """
+    if len(amounts) == 0:
+        return [values[:0] for values in columns], counts[:0], amounts[:0], np.array([], dtype=np.uint64)
+
+    if hashes is None:
+        hashes = hash_keys(columns)
+    order = np.argsort(hashes)
+    sorted_hashes = hashes[order]
+    changed = np.empty(len(order), dtype=bool)
+    changed[0] = True
+    np.not_equal(sorted_hashes[1:], sorted_hashes[:-1], out=changed[1:])
+    starts = np.flatnonzero(changed)
+
+    # Every later row of a group must match the group's first row
+    later = np.flatnonzero(~changed)
+    if len(later):
+        rows = order[later]
+        first = order[starts[np.searchsorted(starts, later, side='right') - 1]]
+        for values in columns:
+            exact = values.view(np.int64) if values.dtype.kind == 'M' else values
+            if not np.array_equal(exact[rows], exact[first]):
+                order, starts = _exact_group_starts(columns)
+                hashes = hash_keys(columns)
+                break
+
+    group_rows = order[starts]
+    return (
+        [values[group_rows] for values in columns],
+        np.add.reduceat(counts[order], starts),
+        np.add.reduceat(amounts[order], starts),
+        hashes[group_rows]
+    )
+
+def group_totals(columns: List[np.ndarray], amount: np.ndarray) -> Iterator[Tuple[Tuple[str, ...], int, int]]:
+    """Yields (labels, count, amount) for each distinct combination of keys"""
+    keys, counts, sums, _ = reduce_groups(columns, np.ones(len(amount), dtype=np.int64), amount)
+    for i in range(len(counts)):
+        yield tuple(_label(values[i]) for values in keys), int(counts[i]), int(sums[i])
+
+class GroupTotals:
+    """
+    Running (count, amount) totals per group for one report dimension, held as
+    NumPy arrays alongside each group's hash. Each chunk's groups are buffered
+    and merged into the totals by re-reducing once the buffer outgrows them,
+    so merging stays vectorised and reuses the hashes.
+
+    Memory is bounded by max_tracked groups plus the buffer: when a merge
+    leaves more groups than that, only the largest by amount are kept and the
+    dimension is marked approximate, as an evicted group that reappears
+    restarts from zero.
+    """
+
+    def __init__(self, max_tracked: int = DEFAULT_MAX_TRACKED_GROUPS):
+        self.max_tracked = max_tracked
+        self.keys: Optional[List[np.ndarray]] = None
+        self.counts = np.array([], dtype=np.int64)
+        self.amounts = np.array([], dtype=np.int64)
+        self.hashes = np.array([], dtype=np.uint64)
+        self.approximate = False
+        self._pending: List[Tuple[List[np.ndarray], np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending_rows = 0
+
+    def add(self, columns: List[np.ndarray], amount: np.ndarray):
+        groups = reduce_groups(columns, np.ones(len(amount), dtype=np.int64), amount)
+        self._pending.append(groups)
+        self._pending_rows += len(groups[1])
+        if self._pending_rows >= max(len(self.counts), MIN_MERGE_ROWS):
+            self.merge()
+
+    def merge(self):
+        if not self._pending:
+            return
+        parts = self._pending
+        if self.keys is not None:
+            parts = [(self.keys, self.counts, self.amounts, self.hashes)] + parts
+        self.keys, self.counts, self.amounts, self.hashes = reduce_groups(
+            [np.concatenate([part[0][i] for part in parts]) for i in range(len(parts[0][0]))],
+            np.concatenate([part[1] for part in parts]),
+            np.concatenate([part[2] for part in parts]),
+            np.concatenate([part[3] for part in parts])
+        )
+        self._pending = []
+        self._pending_rows = 0
+
+        if len(self.counts) > self.max_tracked:
+            self.approximate = True
+            keep = self._largest_positions(self.max_tracked)
+            self.keys = [values[keep] for values in self.keys]
+            self.counts = self.counts[keep]
+            self.amounts = self.amounts[keep]
+            self.hashes = self.hashes[keep]
+
+    def _largest_positions(self, limit: int) -> np.ndarray:
+        """Positions of the largest groups by amount"""
+        return np.argpartition(-self.amounts, limit - 1)[:limit]
+
+    def __len__(self) -> int:
+        self.merge()
+        return len(self.counts)
+
+    def largest(self, limit: Optional[int] = None) -> Iterator[Tuple[Tuple[str, ...], int, int]]:
+        """Yields (labels, count, amount) in key order, keeping the largest limit groups"""
+        self.merge()
+        if self.keys is None:
+            return
+        positions = np.arange(len(self.counts))
+        if limit is not None and len(self.counts) > limit:
+            positions = self._largest_positions(limit)
+        # Groups are held in hash order; report them in key order
+        keys = [values[positions] for values in self.keys]
+        positions = positions[np.lexsort([
+            values.view(np.int64) if values.dtype.kind == 'M' else values for values in keys
+        ][::-1])]
+        for i in positions:
+            yield tuple(_label(values[i]) for values in self.keys), int(self.counts[i]), int(self.amounts[i])
+
+class ReconciliationReport:
+    """
+    Accumulates reconciliation totals chunk by chunk, so memory is bounded by
+    the chunk size and max_tracked_groups per dimension rather than by row count.
+    """
+
+    # Amounts are only summed within a currency
+    DIMENSIONS = {
+        'by_currency': ('currency',),
+        'by_status': ('currency', 'status'),
+        'by_hour': ('currency', 'hour'),
+        'by_account_pair': ('currency', 'source_account', 'destination_account'),
+    }
+
+    def __init__(self, sla_minutes: int = DEFAULT_SLA_MINUTES, now: Optional[datetime] = None,
+                 max_tracked_groups: int = DEFAULT_MAX_TRACKED_GROUPS):
+        self.sla_minutes = sla_minutes
+        self.generated_at = now or datetime.utcnow()
+        self.stuck_before = np.datetime64(self.generated_at - timedelta(minutes=sla_minutes), 'us')
+        self.total_count = 0
+        self.groups: Dict[str, GroupTotals] = {name: GroupTotals(max_tracked_groups) for name in self.DIMENSIONS}
+        self.stuck_count = 0
+        self.stuck_ids: List[str] = []
+        self.oldest_stuck: Optional[np.datetime64] = None
+
+    def add_chunk(self, chunk: TransactionChunk):
+        self.total_count += len(chunk)
+
+        for name, fields in self.DIMENSIONS.items():
+            self.groups[name].add([getattr(chunk, field) for field in fields], chunk.amount)
+
+        stuck = (chunk.status == 'PROCESSING') & (chunk.created_at < self.stuck_before)
+        stuck_count = int(np.count_nonzero(stuck))
+        if stuck_count:
+            self.stuck_count += stuck_count
+            room = MAX_STUCK_REPORTED - len(self.stuck_ids)
+            if room > 0:
+                self.stuck_ids.extend(chunk.transaction_id[stuck][:room].tolist())
+            oldest = chunk.created_at[stuck].min()
+            if self.oldest_stuck is None or oldest < self.oldest_stuck:
+                self.oldest_stuck = oldest
+
+    def to_dict(self, max_groups: Optional[int] = None) -> dict:
+        """
+        With max_groups, each dimension keeps only its largest groups by
+        amount, and 'truncated' records how many groups it had in total.
+        'approximate' lists dimensions that outgrew max_tracked_groups.
+        """
+        report = {
+            'generated_at': self.generated_at,
+            'total_count': self.total_count,
+            'stuck': {
+                'sla_minutes': self.sla_minutes,
+                'count': self.stuck_count,
+                'transaction_ids': self.stuck_ids,
+                'oldest_created_at': self.oldest_stuck.item() if self.oldest_stuck is not None else None
+            },
+            'truncated': {}
+        }
+
+        for name, fields in self.DIMENSIONS.items():
+            groups = self.groups[name]
+            if max_groups is not None and len(groups) > max_groups:
+                report['truncated'][name] = len(groups)
+
+            report[name] = [
+                {
+                    **dict(zip(fields, labels)),
+                    'count': count,
+                    'amount': amount / 100.0  # Convert back from cents
+                }
+                for labels, count, amount in groups.largest(max_groups)
+            ]
+
+        # Read after the final merge, which can itself evict groups
+        report['approximate'] = [name for name, groups in self.groups.items() if groups.approximate]
+        return report
+
+def build_reconciliation_report(chunks: Iterable[TransactionChunk],
+                                sla_minutes: int = DEFAULT_SLA_MINUTES,
+                                max_groups: Optional[int] = None,
+                                max_tracked_groups: int = DEFAULT_MAX_TRACKED_GROUPS) -> dict:
+    report = ReconciliationReport(sla_minutes=sla_minutes, max_tracked_groups=max_tracked_groups)
+    for chunk in chunks:
+        report.add_chunk(chunk)
+    return report.to_dict(max_groups)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build the daily transaction reconciliation report")
+    parser.add_argument("--csv", help="Read a CSV export instead of the transactions table")
+    parser.add_argument("--sla-minutes", type=int, default=DEFAULT_SLA_MINUTES,
+                        help="Minutes a transaction may stay PROCESSING before it is reported as stuck")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows loaded into memory at a time")
+    parser.add_argument("--include-archive", action="store_true",
+                        help="Also include archived PROCESSED transactions")
+    parser.add_argument("--max-groups", type=int, default=None,
+                        help="Keep only the largest groups per dimension (default: all)")
+    parser.add_argument("--max-tracked-groups", type=int, default=DEFAULT_MAX_TRACKED_GROUPS,
+                        help="Groups held in memory per dimension before the smallest are dropped")
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        chunks = iter_csv_chunks(args.csv, args.chunk_size)
+    else:
+        chunks = iter_database_chunks(args.chunk_size)
+
+    if args.include_archive:
+        # Imported here because the archive builds on this module
+        from app.archive import transaction_archive
+        chunks = chain(transaction_archive.iter_chunks(), chunks)
+
+    report = build_reconciliation_report(chunks, sla_minutes=args.sla_minutes, max_groups=args.max_groups,
+                                         max_tracked_groups=args.max_tracked_groups)
+    print(json.dumps(report, indent=2, default=str))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# app/routes/accounts.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from app.models import AccountSummaryResponse, AggregateRebuildResponse, CurrencySummary
+from app.aggregates import account_aggregates
+from app.auth import require_admin
+
+router = APIRouter()
+
+@router.get("/v1/accounts/{account_id}/summary", response_model=AccountSummaryResponse)
+async def get_account_summary(account_id: str):
+    """
+    Get inflow/outflow totals and status counts for an account, per currency
+    """
+    currencies = account_aggregates.get_account(account_id)
+
+    if not currencies:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found"
+        )
+
+    return AccountSummaryResponse(
+        account_id=account_id,
+        currencies=[
+            CurrencySummary(
+                currency=currency,
+                inflow=totals.inflow / 100.0,  # Convert back from cents
+                outflow=totals.outflow / 100.0,
+                net=(totals.inflow - totals.outflow) / 100.0,
+                processing_count=totals.processing_count,
+                processed_count=totals.processed_count
+            )
+            for currency, totals in sorted(currencies.items())
+        ]
+    )
+
+@router.post(
+    "/v1/accounts/summary/rebuild",
+    response_model=AggregateRebuildResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def rebuild_account_summaries():
+    """
+    Recompute all account aggregates from the transactions table
+    - Reports accounts whose running totals disagreed with the recomputed ones
+    - Replaces the running totals with the recomputed ones
+    """
+    try:
+        report = await run_in_threadpool(account_aggregates.rebuild)
+        return AggregateRebuildResponse(**report)
+
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except Exception as e:
+        print(f"Account aggregate rebuild error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
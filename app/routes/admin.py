@@ -0,0 +1,87 @@
+# app/routes/admin.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from app.auth import require_admin
+from app.notifications import notification_dispatcher
+from app.profiling import profiler_session, request_profiles, loop_lag_monitor, SamplingProfiler, DEFAULT_SAMPLE_INTERVAL_MS
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+def _folded_download(profiler: SamplingProfiler, filename: str) -> PlainTextResponse:
+    return PlainTextResponse(
+        profiler.folded(),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/v1/admin/profiler/start")
+async def start_profiler(
+    seconds: float = Query(30, gt=0, le=600, description="Stop automatically after this many seconds"),
+    interval_ms: float = Query(DEFAULT_SAMPLE_INTERVAL_MS, ge=1, le=1000, description="Sampling interval")
+):
+    """
+    Start the sampling profiler for a fixed duration
+    """
+    try:
+        return profiler_session.start(seconds, interval_ms)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+@router.post("/v1/admin/profiler/stop")
+async def stop_profiler():
+    """
+    Stop the sampling profiler early
+    """
+    summary = profiler_session.stop()
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiler has not been started"
+        )
+    return summary
+
+@router.get("/v1/admin/profiler/result")
+async def download_profile():
+    """
+    Download the last profiling run as folded stacks
+    """
+    if profiler_session.profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiler has not been started"
+        )
+    if profiler_session.running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Profiler is still running"
+        )
+    return _folded_download(profiler_session.profiler, "profile.folded")
+
+@router.get("/v1/admin/profiler/requests/{profile_id}")
+async def download_request_profile(profile_id: str):
+    """
+    Download the profile of a request sent with X-Profile: 1
+    """
+    profiler = request_profiles.get(profile_id)
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Request profile not found"
+        )
+    return _folded_download(profiler, f"request-{profile_id}.folded")
+
+@router.get("/v1/admin/loop-lag")
+async def get_loop_lag():
+    """
+    Event loop lag statistics since startup
+    """
+    return loop_lag_monitor.stats()
+
+@router.get("/v1/admin/notifications/metrics")
+async def get_notification_metrics():
+    """
+    Outbound notification delivery metrics per destination account
+    """
+    return notification_dispatcher.metrics_snapshot()
@@ -0,0 +1,43 @@
+# app/routes/reports.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from itertools import chain
+from app.models import ReconciliationReportResponse
+from app.archive import transaction_archive
+from app.auth import require_admin
+from app.reports import build_reconciliation_report, iter_database_chunks, DEFAULT_CHUNK_SIZE, DEFAULT_MAX_GROUPS, DEFAULT_SLA_MINUTES
+from app.encoding import NegotiatedResponse, NegotiatedRoute
+
+router = APIRouter(route_class=NegotiatedRoute, default_response_class=NegotiatedResponse)
+
+@router.get(
+    "/v1/reports/reconciliation",
+    response_model=ReconciliationReportResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(require_admin)]
+)
+async def get_reconciliation_report(
+    sla_minutes: int = Query(DEFAULT_SLA_MINUTES, gt=0, description="Minutes before a PROCESSING transaction counts as stuck"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, gt=0, le=500000, description="Rows loaded into memory at a time"),
+    include_archive: bool = Query(False, description="Also include archived PROCESSED transactions"),
+    max_groups: int = Query(DEFAULT_MAX_GROUPS, gt=0, le=10000, description="Largest groups returned per dimension")
+):
+    """
+    Reconciliation totals by currency, status, hour and account pair
+    - Streams the transactions table in fixed-size chunks
+    - Reports transactions stuck in PROCESSING past the SLA
+    - Returns at most max_groups groups per dimension, largest by amount
+    """
+    try:
+        chunks = iter_database_chunks(chunk_size)
+        if include_archive:
+            chunks = chain(transaction_archive.iter_chunks(), chunks)
+
+        return await run_in_threadpool(build_reconciliation_report, chunks, sla_minutes, max_groups)
+
+    except Exception as e:
+        print(f"Reconciliation report error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
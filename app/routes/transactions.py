@@ -1,11 +1,16 @@
 # app/routes/transactions.py
 from fastapi import APIRouter, HTTPException, status, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from typing import List
 from app.models import WebhookPayload, TransactionResponse, HealthResponse, ErrorResponse
 from app.database import Database
+from app.aggregates import account_aggregates
+from app.archive import transaction_archive
+from app.cache import transaction_cache, cache_transaction
 from app.utils import process_transaction_in_background, is_processing, generate_transaction_id
+from app.encoding import NegotiatedResponse, NegotiatedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute, default_response_class=NegotiatedResponse)
 
 @router.get("/", response_model=HealthResponse)
 async def health_check():
@@ -62,6 +67,10 @@ async def receive_transaction_webhook(
         if existing_transaction.data and len(existing_transaction.data) > 0:
             return {"acknowledged": True, "status": "duplicate"}
 
+        # Old PROCESSED transactions only exist in the archive
+        if await run_in_threadpool(transaction_archive.contains, payload.transaction_id):
+            return {"acknowledged": True, "status": "duplicate"}
+
         # Insert transaction with PROCESSING status
         transaction_data = {
             'transaction_id': payload.transaction_id,
@@ -84,6 +93,8 @@ async def receive_transaction_webhook(
                 detail="Failed to process transaction"
             )
 
+        account_aggregates.record_inserted(transaction_data)
+
         # Start background processing
         background_tasks.add_task(process_transaction_in_background, payload.transaction_id)
 
@@ -106,6 +117,8 @@ async def receive_transaction_webhook(
 async def get_transaction_status(transaction_id: str):
     """
     Get transaction status by transaction ID
+    - Serves recently read transactions from the in-process cache
+    - Falls back to the archive for old PROCESSED transactions
     """
     try:
         if not transaction_id:
@@ -114,20 +127,29 @@ async def get_transaction_status(transaction_id: str):
                 detail="Transaction ID is required"
             )
 
-        client = Database.get_client()
-        result = client.table('transactions')\
-            .select('*')\
-            .eq('transaction_id', transaction_id)\
-            .execute()
+        transaction = transaction_cache.get(transaction_id)
 
-        if not result.data or len(result.data) == 0:
+        if transaction is None:
+            client = Database.get_client()
+            result = client.table('transactions')\
+                .select('*')\
+                .eq('transaction_id', transaction_id)\
+                .execute()
+
+            if result.data and len(result.data) > 0:
+                transaction = result.data[0]
+            else:
+                transaction = await run_in_threadpool(transaction_archive.lookup, transaction_id)
+
+            if transaction:
+                cache_transaction(transaction)
+
+        if not transaction:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Transaction not found"
             )
 
-        transaction = result.data[0]
-
         # Convert amount back from cents to main unit
         response_data = {
             'transaction_id': transaction['transaction_id'],
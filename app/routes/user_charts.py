@@ -2,9 +2,11 @@
 from fastapi import APIRouter, HTTPException, status
 from app.models import UserChartRequest, UserChartResponse, ChartData, ErrorResponse
 from app.database import Database
+from app.cache import user_chart_cache
+from app.encoding import NegotiatedResponse, NegotiatedRoute
 import re
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute, default_response_class=NegotiatedResponse)
 
 def is_valid_email(email: str) -> bool:
     """Validate email format"""
@@ -56,6 +58,14 @@ async def handle_user_charts(request: UserChartRequest):
                     detail="Failed to save chart data"
                 )
 
+            if result.data:
+                user_chart_cache.set(email, {
+                    'chart_data': result.data[0]['chart_data'],
+                    'updated_at': result.data[0]['updated_at']
+                })
+            else:
+                user_chart_cache.discard(email)
+
             return UserChartResponse(
                 success=True,
                 message="Chart data saved successfully"
@@ -63,24 +73,30 @@ async def handle_user_charts(request: UserChartRequest):
 
         elif request.action == "get":
             # Get existing chart data
-            result = client.table('user_charts')\
-                .select('chart_data, updated_at')\
-                .eq('email', email)\
-                .execute()
+            user_chart = user_chart_cache.get(email)
 
-            if result.error and result.error.message != "JSON object requested, multiple (or no) rows returned":
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to fetch chart data"
-                )
+            if user_chart is None:
+                result = client.table('user_charts')\
+                    .select('chart_data, updated_at')\
+                    .eq('email', email)\
+                    .execute()
+
+                if result.error and result.error.message != "JSON object requested, multiple (or no) rows returned":
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail="Failed to fetch chart data"
+                    )
+
+                if result.data and len(result.data) > 0:
+                    user_chart = result.data[0]
+                    user_chart_cache.set(email, user_chart)
 
             chart_data = None
             last_updated = None
 
-            if result.data and len(result.data) > 0:
-                chart_data_dict = result.data[0]['chart_data']
-                chart_data = ChartData(**chart_data_dict)
-                last_updated = result.data[0]['updated_at']
+            if user_chart:
+                chart_data = ChartData(**user_chart['chart_data'])
+                last_updated = user_chart['updated_at']
 
             return UserChartResponse(
                 success=True,
@@ -3,6 +3,9 @@ import asyncio
 import uuid
 from typing import Set
 from app.database import Database
+from app.aggregates import account_aggregates
+from app.notifications import notification_dispatcher
+from app.cache import cache_transaction
 
 # In-memory store for tracking processing transactions
 processing_transactions: Set[str] = set()
@@ -22,17 +25,29 @@ async def process_transaction_in_background(transaction_id: str):
         
         print(f"Completing processing for transaction: {transaction_id}")
         
-        # Update transaction status to PROCESSED
+        # Update transaction status to PROCESSED, unless another worker already did
         client = Database.get_client()
         result = client.table('transactions').update({
             'status': 'PROCESSED',
             'processed_at': 'now()',
             'updated_at': 'now()'
-        }).eq('transaction_id', transaction_id).execute()
+        }).eq('transaction_id', transaction_id)\
+            .eq('status', 'PROCESSING')\
+            .execute()
         
         if result.error:
             print(f"Error updating transaction status: {result.error}")
             raise Exception(result.error)
+
+        # Only the worker whose update changed the row records the completion
+        if not result.data:
+            print(f"Transaction {transaction_id} was no longer PROCESSING, skipping completion")
+            return
+
+        transaction = result.data[0]
+        account_aggregates.record_processed(transaction)
+        notification_dispatcher.enqueue(transaction)
+        cache_transaction(transaction)
             
         print(f"Transaction {transaction_id} processed successfully")
         
@@ -45,7 +60,9 @@ async def process_transaction_in_background(transaction_id: str):
             client.table('transactions').update({
                 'status': 'PROCESSING',  # Keep as processing for retry
                 'updated_at': 'now()'
-            }).eq('transaction_id', transaction_id).execute()
+            }).eq('transaction_id', transaction_id)\
+                .eq('status', 'PROCESSING')\
+                .execute()
         except Exception as update_error:
             print(f"Failed to update transaction status after error: {update_error}")
             
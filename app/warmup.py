@@ -0,0 +1,241 @@
+# app/warmup.py
+import asyncio
+import os
+import struct
+import time
+import zlib
+from typing import Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from app.aggregates import account_aggregates
+from app.cache import transaction_cache, user_chart_cache, cache_transaction
+from app.database import Database
+from app.utils import processing_transactions, process_transaction_in_background, is_processing
+
+SNAPSHOT_PATH = os.getenv("WARMUP_SNAPSHOT_PATH", os.path.join("data", "warmup.snapshot"))
+SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("WARMUP_SNAPSHOT_INTERVAL_SECONDS", "60"))
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "30"))
+WARMUP_RECENT_CHARTS = int(os.getenv("WARMUP_RECENT_CHARTS", "500"))
+
+# PostgREST caps rows per request and the length of in.(...) filters
+DB_PAGE_SIZE = 1000
+IN_FILTER_BATCH_SIZE = 200
+
+SNAPSHOT_MAGIC = b"WFWARM"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct(">6sBd")
+SNAPSHOT_SECTIONS = ("transactions", "user_charts", "in_flight")
+
+def encode_snapshot(sections: Dict[str, List[str]], created_at: Optional[float] = None) -> bytes:
+    """
+    Header (magic, version, created_at) followed by a zlib-compressed body of
+    length-prefixed UTF-8 keys, one counted section per SNAPSHOT_SECTIONS entry.
+    """
+    body = bytearray()
+    for name in SNAPSHOT_SECTIONS:
+        keys = sections.get(name, [])
+        body += struct.pack(">I", len(keys))
+        for key in keys:
+            encoded = key.encode()
+            body += struct.pack(">H", len(encoded)) + encoded
+
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, created_at or time.time())
+    return header + zlib.compress(bytes(body))
+
+def decode_snapshot(data: bytes) -> Dict[str, List[str]]:
+    try:
+        magic, version, created_at = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("Unrecognised snapshot header")
+
+        body = zlib.decompress(data[SNAPSHOT_HEADER.size:])
+        sections: Dict[str, List[str]] = {}
+        offset = 0
+        for name in SNAPSHOT_SECTIONS:
+            (count,) = struct.unpack_from(">I", body, offset)
+            offset += 4
+            keys = []
+            for _ in range(count):
+                (length,) = struct.unpack_from(">H", body, offset)
+                offset += 2
+                keys.append(body[offset:offset + length].decode())
+                offset += length
+            sections[name] = keys
+    except (struct.error, zlib.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Corrupt snapshot: {e}")
+
+    sections["created_at"] = created_at
+    return sections
+
+def write_snapshot(path: str = SNAPSHOT_PATH):
+    """Persist the hot cache keys and in-flight transaction IDs"""
+    data = encode_snapshot({
+        "transactions": transaction_cache.keys(),
+        "user_charts": user_chart_cache.keys(),
+        # Informational; warm-up resumes every PROCESSING row in the table
+        "in_flight": sorted(processing_transactions)
+    })
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_snapshot(path: str = SNAPSHOT_PATH) -> Optional[Dict[str, List[str]]]:
+    try:
+        with open(path, "rb") as f:
+            return decode_snapshot(f.read())
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"Ignoring warm-up snapshot: {e}")
+        return None
+
+def _fetch_by_keys(client, table: str, column: str, keys: List[str]) -> List[dict]:
+    rows = []
+    for start in range(0, len(keys), IN_FILTER_BATCH_SIZE):
+        result = client.table(table)\
+            .select('*')\
+            .in_(column, keys[start:start + IN_FILTER_BATCH_SIZE])\
+            .execute()
+        rows.extend(result.data or [])
+    return rows
+
+def _fetch_processing(client) -> List[dict]:
+    """Every PROCESSING row, paged by transaction_id"""
+    rows = []
+    cursor = ""
+    while True:
+        result = client.table('transactions')\
+            .select('*')\
+            .eq('status', 'PROCESSING')\
+            .gt('transaction_id', cursor)\
+            .order('transaction_id')\
+            .limit(DB_PAGE_SIZE)\
+            .execute()
+
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < DB_PAGE_SIZE:
+            return rows
+        cursor = page[-1]['transaction_id']
+
+class WarmUpManager:
+    """
+    Restores hot state after a restart and holds readiness back until the
+    caches are warm or WARMUP_TIMEOUT_SECONDS has passed.
+    """
+
+    def __init__(self, snapshot_path: str = SNAPSHOT_PATH):
+        self.snapshot_path = snapshot_path
+        self.ready = False
+        self.timed_out = False
+        self.summary: Dict[str, int] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def _warm_caches(self) -> List[str]:
+        """Bulk-load caches from the database; returns PROCESSING IDs to resume"""
+        client = Database.get_client()
+        snapshot = read_snapshot(self.snapshot_path) or {}
+
+        # Snapshot order is least to most recently used, so replaying it keeps LRU order
+        transaction_ids = snapshot.get("transactions", [])
+        rows = {row['transaction_id']: row for row in _fetch_by_keys(
+            client, 'transactions', 'transaction_id', transaction_ids
+        )}
+        for transaction_id in transaction_ids:
+            if transaction_id in rows:
+                cache_transaction(rows[transaction_id])
+
+        # The snapshot's in_flight list misses anything accepted since it was
+        # written, so resume every PROCESSING row; completion is conditional
+        processing = _fetch_processing(client)
+
+        recent = client.table('user_charts')\
+            .select('email, chart_data, updated_at')\
+            .order('updated_at', desc=True)\
+            .limit(min(WARMUP_RECENT_CHARTS, DB_PAGE_SIZE))\
+            .execute()
+        charts = list(reversed(recent.data or []))
+        snapshot_emails = snapshot.get("user_charts", [])
+        charts_by_email = {row['email']: row for row in _fetch_by_keys(client, 'user_charts', 'email', snapshot_emails)}
+        charts.extend(charts_by_email[email] for email in snapshot_emails if email in charts_by_email)
+        for row in charts:
+            user_chart_cache.set(row['email'], {'chart_data': row['chart_data'], 'updated_at': row['updated_at']})
+
+        self.summary = {
+            "transactions": len(transaction_cache),
+            "user_charts": len(user_chart_cache),
+            "processing": len(processing)
+        }
+
+        try:
+            self.summary["accounts"] = account_aggregates.rebuild()['accounts']
+        except Exception as e:
+            print(f"Failed to seed account aggregates: {e}")
+
+        return [row['transaction_id'] for row in processing]
+
+    def _resume_in_flight(self, transaction_ids: List[str]):
+        """Restart background processing that was cut off by the restart"""
+        for transaction_id in transaction_ids:
+            if not is_processing(transaction_id):
+                processing_transactions.add(transaction_id)
+                asyncio.create_task(process_transaction_in_background(transaction_id))
+        if transaction_ids:
+            print(f"Resumed processing for {len(transaction_ids)} in-flight transactions")
+
+    async def _run(self):
+        started = time.monotonic()
+        warm = asyncio.ensure_future(run_in_threadpool(self._warm_caches))
+
+        try:
+            try:
+                in_flight = await asyncio.wait_for(asyncio.shield(warm), WARMUP_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                self.timed_out = True
+                self.ready = True
+                print(f"Warm-up still running after {WARMUP_TIMEOUT_SECONDS}s, marking ready")
+                in_flight = await warm
+
+            self._resume_in_flight(in_flight)
+            print(f"Warm-up finished in {time.monotonic() - started:.1f}s: {self.summary}")
+        except Exception as e:
+            print(f"Warm-up failed: {e}")
+        finally:
+            self.ready = True
+
+    async def _snapshot_periodically(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+            # A snapshot taken mid warm-up would drop keys not restored yet
+            if not self.ready:
+                continue
+            try:
+                await run_in_threadpool(write_snapshot, self.snapshot_path)
+            except Exception as e:
+                print(f"Failed to write warm-up snapshot: {e}")
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._snapshot_periodically())
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if not self.ready:
+            return
+        try:
+            await run_in_threadpool(write_snapshot, self.snapshot_path)
+        except Exception as e:
+            print(f"Failed to write warm-up snapshot: {e}")
+
+    def status(self) -> dict:
+        return {"ready": self.ready, "timed_out": self.timed_out, **self.summary}
+
+warmup_manager = WarmUpManager()
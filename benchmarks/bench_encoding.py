@@ -0,0 +1,63 @@
+# benchmarks/bench_encoding.py
+"""
+Encode cost against bytes saved for the negotiated response formats.
+
+Run with: python -m benchmarks.bench_encoding
+"""
+import timeit
+from app.encoding import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, brotli, compress, encode_payload
+
+def chart_payload(points: int) -> dict:
+    return {
+        "success": True,
+        "chartData": {
+            "callDuration": [{"name": f"Day {i}", "value": None, "duration": i * 1.5} for i in range(points)],
+            "sadPath": [{"name": f"Reason {i}", "value": float(i), "duration": None} for i in range(points)]
+        },
+        "message": None,
+        "lastUpdated": "2024-01-01T00:00:00+00:00"
+    }
+
+def report_payload(groups: int) -> dict:
+    return {
+        "generated_at": "2024-01-01T00:00:00",
+        "total_count": groups * 10,
+        "by_account_pair": [
+            {"currency": "INR", "source_account": f"acc_{i}", "destination_account": f"acc_{i + 1}",
+             "count": 10, "amount": i * 100.25}
+            for i in range(groups)
+        ]
+    }
+
+PAYLOADS = {
+    "chart (tiny)": chart_payload(2),
+    "chart (30 points)": chart_payload(30),
+    "chart (365 points)": chart_payload(365),
+    "report (5000 pairs)": report_payload(5000),
+}
+
+def measure(payload: dict, media_type: str, encoding: str, repeat: int) -> tuple:
+    def run():
+        body = encode_payload(payload, media_type)
+        return compress(body, encoding) if encoding else body
+
+    size = len(run())
+    seconds = min(timeit.repeat(run, number=repeat, repeat=3)) / repeat
+    return size, seconds * 1e6
+
+def main():
+    encodings = [None, "gzip"] + (["br"] if brotli is not None else [])
+    print(f"{'payload':<20} {'format':<10} {'encoding':<9} {'bytes':>9} {'saved':>7} {'encode us':>10}")
+
+    for name, payload in PAYLOADS.items():
+        baseline = len(encode_payload(payload, JSON_MEDIA_TYPE))
+        repeat = 20 if baseline > 100000 else 200
+        for media_type in (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE):
+            for encoding in encodings:
+                size, micros = measure(payload, media_type, encoding, repeat)
+                saved = 100.0 * (baseline - size) / baseline
+                print(f"{name:<20} {media_type.split('/')[1]:<10} {encoding or '-':<9} "
+                      f"{size:>9} {saved:>6.1f}% {micros:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# tests/conftest.py
+import pytest
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+        self.error = None
+
+class FakeQuery:
+    """Just enough of the supabase query builder for the code under test"""
+
+    def __init__(self, rows, on_execute=None):
+        self.rows = rows
+        self.on_execute = on_execute
+        self.filters = []
+        self.order_column = None
+        self.descending = False
+        self.row_limit = None
+        self.operation = 'select'
+        self.values = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] > value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] < value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        self.order_column = column
+        self.descending = desc
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def update(self, values):
+        self.operation = 'update'
+        self.values = values
+        return self
+
+    def delete(self):
+        self.operation = 'delete'
+        return self
+
+    def execute(self):
+        matched = [row for row in self.rows if all(f(row) for f in self.filters)]
+        if self.order_column:
+            matched.sort(key=lambda row: row.get(self.order_column) or '', reverse=self.descending)
+        if self.row_limit is not None:
+            matched = matched[:self.row_limit]
+
+        if self.operation == 'update':
+            for row in matched:
+                row.update(self.values)
+        elif self.operation == 'delete':
+            self.rows[:] = [row for row in self.rows if row not in matched]
+
+        result = FakeResult([dict(row) for row in matched])
+        if self.on_execute:
+            self.on_execute(self)
+        return result
+
+class FakeClient:
+    def __init__(self, tables, on_execute=None):
+        self.tables = tables
+        self.on_execute = on_execute
+
+    def table(self, name):
+        return FakeQuery(self.tables.setdefault(name, []), self.on_execute)
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Route Database.get_client() to an in-memory FakeClient"""
+    from app.database import Database
+    client = FakeClient({'transactions': [], 'user_charts': []})
+    monkeypatch.setattr(Database, 'get_client', classmethod(lambda cls: client))
+    return client
+
+def make_transaction(transaction_id, status='PROCESSING', source='acc_1', destination='acc_2',
+                     amount=1000, currency='INR', created_at='2024-01-01T10:00:00+00:00',
+                     processed_at=None):
+    return {
+        'transaction_id': transaction_id,
+        'source_account': source,
+        'destination_account': destination,
+        'amount': amount,
+        'currency': currency,
+        'status': status,
+        'created_at': created_at,
+        'processed_at': processed_at,
+        'updated_at': created_at
+    }
@@ -0,0 +1,147 @@
+# tests/test_aggregates.py
+import pytest
+from app import aggregates
+from app.aggregates import AccountAggregates
+from tests.conftest import make_transaction
+
+@pytest.fixture(autouse=True)
+def empty_archive(monkeypatch, tmp_path):
+    from app.archive import TransactionArchive
+    store = TransactionArchive(str(tmp_path))
+    monkeypatch.setattr(aggregates, 'transaction_archive', store)
+    return store
+
+def run_rebuild_with_events(fake_db, totals, on_page, page=2):
+    """Rebuild with page_size=2, firing on_page while page number `page` is read"""
+    pages = []
+
+    def on_execute(query):
+        pages.append(query)
+        if len(pages) == page:
+            on_page()
+
+    fake_db.on_execute = on_execute
+    report = totals.rebuild(page_size=2)
+    fake_db.on_execute = None
+    return report
+
+def test_rebuild_matches_incremental_updates(fake_db):
+    totals = AccountAggregates()
+    for i in range(5):
+        row = make_transaction(f"t{i}", status='PROCESSED' if i % 2 else 'PROCESSING', amount=100 * (i + 1))
+        fake_db.tables['transactions'].append(row)
+        totals.record_inserted({**row, 'status': 'PROCESSING'})
+        if i % 2:
+            totals.record_processed(row)
+
+    report = totals.rebuild()
+
+    assert report['consistent'] is True
+    assert report['transactions'] == 5
+    source = totals.get_account('acc_1')['INR']
+    assert (source.outflow, source.processing_count, source.processed_count) == (1500, 3, 2)
+
+def test_rebuild_does_not_replay_processing_already_scanned(fake_db):
+    # Committed as PROCESSED before the scan, but record_processed runs after the cursor passed it
+    totals = AccountAggregates()
+    row = make_transaction("t1")
+    fake_db.tables['transactions'].extend([row, make_transaction("t2"), make_transaction("t3")])
+    for transaction in fake_db.tables['transactions']:
+        totals.record_inserted(dict(transaction))
+    row['status'] = 'PROCESSED'
+
+    run_rebuild_with_events(fake_db, totals, lambda: totals.record_processed(dict(row)))
+
+    destination = totals.get_account('acc_2')['INR']
+    assert (destination.inflow, destination.processing_count, destination.processed_count) == (3000, 2, 1)
+    assert totals.rebuild()['consistent'] is True
+
+def test_rebuild_does_not_replay_insert_already_scanned(fake_db):
+    # Committed before the scan, but record_inserted runs after the cursor passed it
+    totals = AccountAggregates()
+    late = make_transaction("t1")
+    fake_db.tables['transactions'].extend([late, make_transaction("t2"), make_transaction("t3")])
+    totals.record_inserted(fake_db.tables['transactions'][1])
+    totals.record_inserted(fake_db.tables['transactions'][2])
+
+    run_rebuild_with_events(fake_db, totals, lambda: totals.record_inserted(dict(late)))
+
+    assert totals.get_account('acc_2')['INR'].inflow == 3000
+    assert totals.rebuild()['consistent'] is True
+
+def test_rebuild_replays_changes_behind_the_cursor(fake_db):
+    totals = AccountAggregates()
+    scanned = make_transaction("t2")
+    fake_db.tables['transactions'].extend([scanned, make_transaction("t3"), make_transaction("t4")])
+    for transaction in fake_db.tables['transactions']:
+        totals.record_inserted(dict(transaction))
+
+    def changes_behind_cursor():
+        # A brand new row behind the cursor, then both it and a scanned row complete
+        inserted = make_transaction("t1", amount=500)
+        fake_db.tables['transactions'].append(inserted)
+        totals.record_inserted(dict(inserted))
+        for row in (inserted, scanned):
+            row['status'] = 'PROCESSED'
+            totals.record_processed(dict(row))
+
+    run_rebuild_with_events(fake_db, totals, changes_behind_cursor)
+
+    destination = totals.get_account('acc_2')['INR']
+    assert (destination.inflow, destination.processing_count, destination.processed_count) == (3500, 2, 2)
+    assert totals.rebuild()['consistent'] is True
+
+def test_rebuild_replays_changes_inside_the_page_in_flight(fake_db):
+    # The first page has already been read when t3 is inserted and t2 completes
+    totals = AccountAggregates()
+    in_page = make_transaction("t2")
+    fake_db.tables['transactions'].extend([in_page, make_transaction("t4"), make_transaction("t6")])
+    for transaction in fake_db.tables['transactions']:
+        totals.record_inserted(dict(transaction))
+
+    def changes_in_page_range():
+        inserted = make_transaction("t3", amount=777)
+        fake_db.tables['transactions'].append(inserted)
+        totals.record_inserted(dict(inserted))
+        in_page['status'] = 'PROCESSED'
+        totals.record_processed(dict(in_page))
+
+    run_rebuild_with_events(fake_db, totals, changes_in_page_range, page=1)
+
+    destination = totals.get_account('acc_2')['INR']
+    assert (destination.inflow, destination.processing_count, destination.processed_count) == (3777, 3, 1)
+    assert totals.rebuild()['consistent'] is True
+
+def old_processed(transaction_id):
+    return make_transaction(transaction_id, status='PROCESSED', processed_at='2024-01-01T10:00:30+00:00')
+
+def test_rebuild_counts_rows_archived_during_the_scan_once(fake_db, empty_archive):
+    totals = AccountAggregates()
+    fake_db.tables['transactions'].extend([old_processed("t1"), make_transaction("t2"), old_processed("t3")])
+    for transaction in fake_db.tables['transactions']:
+        totals.record_inserted(dict(transaction, status='PROCESSING'))
+        if transaction['status'] == 'PROCESSED':
+            totals.record_processed(dict(transaction))
+
+    # t1 was already scanned and t3 not yet reached when both move to the archive
+    report = run_rebuild_with_events(fake_db, totals, lambda: empty_archive.archive_processed(older_than_days=1), page=1)
+
+    assert [row['transaction_id'] for row in fake_db.tables['transactions']] == ['t2']
+    assert report['consistent'] is True
+    destination = totals.get_account('acc_2')['INR']
+    assert (destination.inflow, destination.processing_count, destination.processed_count) == (3000, 1, 2)
+
+def test_rebuild_counts_archived_rows_not_yet_deleted_once(fake_db, empty_archive):
+    from app.archive import rows_to_columns
+    totals = AccountAggregates()
+    row = old_processed("t1")
+    fake_db.tables['transactions'].append(row)
+    totals.record_inserted(dict(row, status='PROCESSING'))
+    totals.record_processed(dict(row))
+    # An archiving run that died after writing the part but before deleting
+    empty_archive._write_segment(empty_archive._write_partitions(rows_to_columns([row])))
+
+    report = totals.rebuild()
+
+    assert report['consistent'] is True
+    assert totals.get_account('acc_1')['INR'].outflow == 1000
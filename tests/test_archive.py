@@ -0,0 +1,112 @@
+# tests/test_archive.py
+import os
+from datetime import datetime
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import archive
+from app.archive import TransactionArchive
+from tests.conftest import make_transaction
+
+def processed(transaction_id, **kwargs):
+    return make_transaction(transaction_id, status='PROCESSED', processed_at='2024-01-01T10:00:30+00:00', **kwargs)
+
+def segment_files(store):
+    return sorted(os.listdir(store.index_dir))
+
+def test_archive_round_trip(fake_db, tmp_path):
+    store = TransactionArchive(str(tmp_path))
+    fake_db.tables['transactions'] = [
+        processed('t2', amount=250, created_at='2024-01-02T09:00:00+05:30'),
+        processed('t1', amount=1000),
+        make_transaction('t3')
+    ]
+
+    assert store.archive_processed(older_than_days=1)['archived'] == 2
+
+    assert [row['transaction_id'] for row in fake_db.tables['transactions']] == ['t3']
+    assert store.lookup('t1') == {
+        'transaction_id': 't1', 'source_account': 'acc_1', 'destination_account': 'acc_2',
+        'currency': 'INR', 'status': 'PROCESSED', 'amount': 1000,
+        'created_at': datetime(2024, 1, 1, 10, 0), 'processed_at': datetime(2024, 1, 1, 10, 0, 30),
+        'updated_at': datetime(2024, 1, 1, 10, 0)
+    }
+    assert store.lookup('t2')['created_at'] == datetime(2024, 1, 2, 3, 30)
+    assert store.lookup('t3') is None
+    assert store.contains('t2') and not store.contains('t3')
+    assert sorted(len(chunk) for chunk in store.iter_chunks()) == [1, 1]
+
+def test_each_run_adds_a_segment_without_rewriting_earlier_ones(fake_db, tmp_path):
+    store = TransactionArchive(str(tmp_path))
+    fake_db.tables['transactions'] = [processed('t1')]
+    store.archive_processed(older_than_days=1)
+    [first] = segment_files(store)
+    first_stat = os.stat(os.path.join(store.index_dir, first))
+
+    fake_db.tables['transactions'] = [processed('t0'), processed('t2')]
+    store.archive_processed(older_than_days=1)
+
+    assert len(segment_files(store)) == 2
+    assert os.stat(os.path.join(store.index_dir, first)).st_mtime_ns == first_stat.st_mtime_ns
+    assert [store.lookup(transaction_id)['transaction_id'] for transaction_id in ('t0', 't1', 't2')] == ['t0', 't1', 't2']
+
+def test_segments_are_merged_past_the_limit(fake_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, 'MAX_INDEX_SEGMENTS', 2)
+    store = TransactionArchive(str(tmp_path))
+    for transaction_id in ('t1', 't2', 't3'):
+        fake_db.tables['transactions'] = [processed(transaction_id)]
+        store.archive_processed(older_than_days=1)
+
+    assert len(segment_files(store)) == 1
+    assert all(store.contains(transaction_id) for transaction_id in ('t1', 't2', 't3'))
+    assert sum(len(chunk) for chunk in store.iter_chunks()) == 3
+
+def test_only_matching_already_archived_rows_are_deleted(fake_db, tmp_path):
+    store = TransactionArchive(str(tmp_path))
+    fake_db.tables['transactions'] = [processed('t1'), processed('t2')]
+    store.archive_processed(older_than_days=1)
+
+    # As if an earlier run died before deleting, and t2 was since changed
+    fake_db.tables['transactions'] = [processed('t1'), processed('t2', amount=999)]
+    assert store.archive_processed(older_than_days=1)['archived'] == 1
+
+    assert [row['transaction_id'] for row in fake_db.tables['transactions']] == ['t2']
+    assert store.lookup('t2')['amount'] == 1000
+    assert len(segment_files(store)) == 1
+
+@pytest.fixture
+def webhook_client(fake_db, tmp_path, monkeypatch):
+    from app.routes import transactions
+    monkeypatch.setattr(transactions, 'process_transaction_in_background', lambda transaction_id: None)
+    monkeypatch.setattr(transactions, 'transaction_archive', TransactionArchive(str(tmp_path)))
+    app = FastAPI()
+    app.include_router(transactions.router)
+    return TestClient(app), transactions.transaction_archive
+
+def test_webhook_treats_archived_transactions_as_duplicates(fake_db, webhook_client):
+    client, store = webhook_client
+    fake_db.tables['transactions'] = [processed('t1')]
+    store.archive_processed(older_than_days=1)
+    payload = {'transaction_id': 't1', 'source_account': 'acc_1', 'destination_account': 'acc_2',
+               'amount': 10, 'currency': 'INR'}
+
+    response = client.post('/v1/webhooks/transactions', json=payload)
+
+    assert response.status_code == 202
+    assert response.json()['status'] == 'duplicate'
+    assert fake_db.tables['transactions'] == []
+
+def test_lookup_decodes_only_one_row_group(fake_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, 'ROW_GROUP_SIZE', 2)
+    store = TransactionArchive(str(tmp_path))
+    fake_db.tables['transactions'] = [processed(f't{i}', amount=i + 1) for i in range(5)]
+    store.archive_processed(older_than_days=1)
+
+    def full_part_read(path):
+        raise AssertionError("lookup decoded the whole part")
+    monkeypatch.setattr(archive, '_read_part', full_part_read)
+    archive._read_row_group.cache_clear()
+
+    assert [store.lookup(f't{i}')['amount'] for i in range(5)] == [1, 2, 3, 4, 5]
+    assert store.lookup('t5') is None
+    assert archive._read_row_group.cache_info().currsize == 3
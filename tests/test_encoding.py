@@ -0,0 +1,68 @@
+# tests/test_encoding.py
+import msgpack
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from app import encoding
+from app.encoding import NegotiatedResponse, NegotiatedRoute, negotiate_content_encoding
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("gzip;q=0.8, br;q=0.9", "br"),
+    ("*", "br"),
+    ("*;q=0.5, gzip", "gzip"),
+    ("br;q=0, *", "gzip"),
+    ("*;q=0", None),
+    ("deflate", None),
+    ("gzip;q=0.5, identity", None),
+    ("gzip, identity;q=0.5", "gzip"),
+])
+def test_negotiate_content_encoding_ranks_by_quality(accept_encoding, expected):
+    assert negotiate_content_encoding(accept_encoding) == expected
+
+def test_negotiate_content_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(encoding, "brotli", None)
+    assert negotiate_content_encoding("br, gzip;q=0.5") == "gzip"
+    assert negotiate_content_encoding("br") is None
+
+@pytest.fixture
+def client():
+    router = APIRouter(route_class=NegotiatedRoute, default_response_class=NegotiatedResponse)
+
+    @router.get("/items")
+    async def items(count: int = 10):
+        return {"items": [{"id": i, "label": f"item-{i}"} for i in range(count)]}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get("/items?count=1", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
+
+@pytest.mark.parametrize("threadpool_min_size", [0, 10 ** 9])
+def test_large_responses_are_compressed(client, monkeypatch, threadpool_min_size):
+    monkeypatch.setattr(encoding, "COMPRESSION_THREADPOOL_MIN_SIZE", threadpool_min_size)
+    offloaded = []
+    real_run_in_threadpool = encoding.run_in_threadpool
+
+    async def tracking_run_in_threadpool(func, *args):
+        offloaded.append(func)
+        return await real_run_in_threadpool(func, *args)
+    monkeypatch.setattr(encoding, "run_in_threadpool", tracking_run_in_threadpool)
+
+    response = client.get("/items?count=500", headers={
+        "Accept": "application/msgpack",
+        "Accept-Encoding": "br;q=0.1, gzip"
+    })
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"] == "application/msgpack"
+    # httpx undoes the content-encoding itself
+    assert len(msgpack.unpackb(response.content)["items"]) == 500
+    assert offloaded == ([encoding.compress] if threadpool_min_size == 0 else [])
@@ -0,0 +1,161 @@
+# tests/test_notifications.py
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from app import notification_receiver, notifications
+from app.notifications import Destination, NotificationDispatcher, load_destinations
+from tests.conftest import make_transaction
+
+RECEIVER_URL = "http://receiver/notifications"
+
+class ScriptedRandom:
+    """Stands in for the receiver's random module to decide which requests fail"""
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def random(self):
+        return self.values.pop(0) if self.values else 1.0
+
+@pytest.fixture(autouse=True)
+def receiver(monkeypatch):
+    notification_receiver.received.clear()
+    notification_receiver.stats.update(requests=0, batches=0, rejected=0)
+    monkeypatch.setattr(notifications, "BACKOFF_BASE_SECONDS", 0.001)
+    return notification_receiver
+
+@pytest.fixture
+def make_dispatcher(tmp_path):
+    dispatchers = []
+
+    def factory(**options):
+        destination = Destination(account_id="merchant", url=options.pop("url", RECEIVER_URL), **options)
+        dispatcher = NotificationDispatcher(
+            {"merchant": destination},
+            dead_letter_path=str(tmp_path / "dead_letters.jsonl"),
+            transport=httpx.ASGITransport(app=notification_receiver.app)
+        )
+        dispatchers.append(dispatcher)
+        return dispatcher
+
+    yield factory
+    for dispatcher in dispatchers:
+        assert dispatcher._client is None, "test must stop its dispatcher"
+
+def dead_letters(dispatcher):
+    try:
+        with open(dispatcher.dead_letter_path) as f:
+            return [json.loads(line) for line in f]
+    except FileNotFoundError:
+        return []
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+def enqueue_many(dispatcher, count):
+    for i in range(count):
+        dispatcher.enqueue(make_transaction(f"t{i}", status="PROCESSED", destination="merchant"))
+
+@pytest.mark.asyncio
+async def test_batches_notifications(make_dispatcher, receiver):
+    dispatcher = make_dispatcher(batch=True, batch_size=10, batch_wait_ms=50)
+    await dispatcher.start()
+    enqueue_many(dispatcher, 25)
+
+    await wait_for(lambda: len(receiver.received) == 25)
+    await dispatcher.stop()
+
+    assert receiver.stats["batches"] == 3
+    assert sorted(n["transaction_id"] for n in receiver.received) == sorted(f"t{i}" for i in range(25))
+    assert receiver.received[0]["amount"] == 10.0
+    metrics = dispatcher.metrics_snapshot()["merchant"]
+    assert (metrics["delivered"], metrics["batches"], metrics["dead_lettered"]) == (25, 3, 0)
+
+@pytest.mark.asyncio
+async def test_retries_on_503(make_dispatcher, receiver, monkeypatch):
+    monkeypatch.setattr(receiver, "FAILURE_RATE", 0.5)
+    monkeypatch.setattr(receiver, "random", ScriptedRandom([0.0, 0.0]))
+    dispatcher = make_dispatcher()
+    await dispatcher.start()
+    enqueue_many(dispatcher, 1)
+
+    await wait_for(lambda: len(receiver.received) == 1)
+    await dispatcher.stop()
+
+    assert receiver.stats["rejected"] == 2
+    metrics = dispatcher.metrics_snapshot()["merchant"]
+    assert (metrics["delivered"], metrics["retries"], metrics["requests"]) == (1, 2, 3)
+    assert dead_letters(dispatcher) == []
+
+@pytest.mark.asyncio
+async def test_dead_letters_non_retryable_client_errors(make_dispatcher, receiver):
+    dispatcher = make_dispatcher(url="http://receiver/missing")
+    await dispatcher.start()
+    enqueue_many(dispatcher, 1)
+
+    await wait_for(lambda: dispatcher.metrics["merchant"].dead_lettered == 1)
+    await dispatcher.stop()
+
+    [record] = dead_letters(dispatcher)
+    assert record["error"] == "HTTP 404"
+    assert [n["transaction_id"] for n in record["notifications"]] == ["t0"]
+    assert dispatcher.metrics["merchant"].requests == 1
+
+@pytest.mark.asyncio
+async def test_stop_dead_letters_queued_notifications(make_dispatcher, receiver):
+    dispatcher = make_dispatcher()
+    await dispatcher.start()
+    # Workers have not run yet, so everything is still queued
+    enqueue_many(dispatcher, 3)
+
+    await dispatcher.stop()
+
+    assert receiver.received == []
+    [record] = dead_letters(dispatcher)
+    assert record["error"] == "dispatcher stopped"
+    assert [n["transaction_id"] for n in record["notifications"]] == ["t0", "t1", "t2"]
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_queue_full_dead_letters(make_dispatcher, receiver, monkeypatch):
+    monkeypatch.setattr(notifications, "MAX_QUEUE_SIZE", 1)
+    dispatcher = make_dispatcher()
+    append_dead_letter = dispatcher._append_dead_letter
+
+    def slow_queue_full_write(record):
+        if '"queue full"' in record:
+            time.sleep(0.2)
+        append_dead_letter(record)
+    monkeypatch.setattr(dispatcher, "_append_dead_letter", slow_queue_full_write)
+    await dispatcher.start()
+    enqueue_many(dispatcher, 3)
+
+    await dispatcher.stop()
+
+    records = sorted(
+        (record["error"], [n["transaction_id"] for n in record["notifications"]])
+        for record in dead_letters(dispatcher)
+    )
+    assert records == [("dispatcher stopped", ["t0"]), ("queue full", ["t1"]), ("queue full", ["t2"])]
+    assert dispatcher.metrics["merchant"].dead_lettered == 3
+
+def test_load_destinations_skips_invalid_entries():
+    destinations = load_destinations(json.dumps({
+        "good": {"url": "https://merchant.example/hooks", "batch": True},
+        "not_an_object": ["https://merchant.example/hooks"],
+        "unknown_option": {"url": "https://merchant.example/hooks", "retries": 3},
+        "missing_url": {"batch": True},
+        "bad_url": {"url": 42},
+        "bad_batch_size": {"url": "https://merchant.example/hooks", "batch_size": 0}
+    }))
+
+    assert list(destinations) == ["good"]
+    assert destinations["good"].batch is True
+
+@pytest.mark.parametrize("config", ["not json", "[]", "null", "\"url\""])
+def test_load_destinations_rejects_malformed_config(config):
+    assert load_destinations(config) == {}
@@ -0,0 +1,57 @@
+# tests/test_profiling.py
+import pytest
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+from app import profiling
+from app.profiling import ProfileRequestMiddleware, PROFILE_ID_HEADER
+
+seen_by_background_task = []
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "request_profiles", profiling.OrderedDict())
+    app = FastAPI()
+    app.add_middleware(ProfileRequestMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"pong": True}
+
+    @app.post("/work")
+    async def work(background_tasks: BackgroundTasks):
+        background_tasks.add_task(lambda: seen_by_background_task.append(dict(profiling.request_profiles)))
+        return {"accepted": True}
+
+    return TestClient(app)
+
+@pytest.mark.parametrize("headers", [
+    {},
+    {"X-Profile": "1"},
+    {"X-Profile": "1", "X-Admin-Token": "wrong"},
+    {"X-Profile": "0", "X-Admin-Token": "secret"},
+])
+def test_unprofiled_requests_pass_through(client, headers):
+    response = client.get("/ping", headers=headers)
+
+    assert response.json() == {"pong": True}
+    assert PROFILE_ID_HEADER not in response.headers
+    assert not profiling.request_profiles
+
+def test_profiled_request_returns_profile_id(client):
+    response = client.get("/ping", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+
+    assert response.json() == {"pong": True}
+    profile_id = response.headers[PROFILE_ID_HEADER]
+    assert list(profiling.request_profiles) == [profile_id]
+    assert not profiling.request_profiles[profile_id].running
+
+def test_profile_ends_before_background_tasks(client):
+    seen_by_background_task.clear()
+
+    response = client.post("/work", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+
+    [profiles] = seen_by_background_task
+    profile_id = response.headers[PROFILE_ID_HEADER]
+    assert list(profiles) == [profile_id]
+    assert not profiles[profile_id].running
@@ -0,0 +1,130 @@
+# tests/test_reports.py
+from datetime import datetime
+import numpy as np
+import pytest
+from app import reports
+from app.reports import (
+    GroupTotals, ReconciliationReport, TransactionChunk, group_totals, iter_csv_chunks, parse_timestamps
+)
+from tests.conftest import make_transaction
+
+def test_parse_timestamps_converts_offsets_to_utc():
+    parsed = parse_timestamps([
+        '2024-01-01T00:00:00Z',
+        '2024-01-01T05:30:00+05:30',
+        '2024-01-01T00:00:00-05:30',
+        '2024-01-01 10:00:00.123456+00:00',
+        '2024-01-01T10:00:00',
+        None
+    ])
+
+    assert parsed[:5].tolist() == [
+        datetime(2024, 1, 1, 0, 0),
+        datetime(2024, 1, 1, 0, 0),
+        datetime(2024, 1, 1, 5, 30),
+        datetime(2024, 1, 1, 10, 0, 0, 123456),
+        datetime(2024, 1, 1, 10, 0)
+    ]
+    assert np.isnat(parsed[5])
+
+def test_parse_timestamps_rejects_malformed_offsets():
+    with pytest.raises(ValueError):
+        parse_timestamps(['2024-01-01T00:00:00+5'])
+
+def test_group_totals_over_multiple_columns():
+    currency = np.array(['INR', 'USD', 'INR', 'INR'])
+    status = np.array(['PROCESSED', 'PROCESSED', 'PROCESSING', 'PROCESSED'])
+    amount = np.array([100, 250, 40, 2 ** 40], dtype=np.int64)
+
+    groups = {labels: (count, total) for labels, count, total in group_totals([currency, status], amount)}
+
+    assert groups == {
+        ('INR', 'PROCESSED'): (2, 100 + 2 ** 40),
+        ('INR', 'PROCESSING'): (1, 40),
+        ('USD', 'PROCESSED'): (1, 250)
+    }
+
+def test_group_totals_empty_chunk():
+    assert list(group_totals([np.array([], dtype=str)], np.array([], dtype=np.int64))) == []
+
+def test_report_merges_chunks_and_flags_stuck_transactions():
+    rows = [
+        make_transaction('t1', status='PROCESSED', amount=1000, created_at='2024-01-01T10:05:00+00:00'),
+        make_transaction('t2', amount=250, created_at='2024-01-01T10:45:00+00:00'),
+        make_transaction('t3', amount=500, currency='USD', created_at='2024-01-01T11:00:00Z')
+    ]
+    report = ReconciliationReport(sla_minutes=5, now=datetime(2024, 1, 1, 12, 0))
+    report.add_chunk(TransactionChunk.from_rows(rows[:2]))
+    report.add_chunk(TransactionChunk.from_rows(rows[2:]))
+
+    result = report.to_dict()
+
+    assert result['total_count'] == 3
+    assert result['by_currency'] == [
+        {'currency': 'INR', 'count': 2, 'amount': 12.5},
+        {'currency': 'USD', 'count': 1, 'amount': 5.0}
+    ]
+    assert [group['hour'] for group in result['by_hour']] == ['2024-01-01T10', '2024-01-01T11']
+    assert result['stuck']['transaction_ids'] == ['t2', 't3']
+    assert result['truncated'] == {}
+    assert result['approximate'] == []
+
+def test_report_caps_groups_per_dimension():
+    rows = [make_transaction(f't{i}', destination=f'acc_{i}', amount=100 * (i + 1)) for i in range(5)]
+    report = ReconciliationReport()
+    report.add_chunk(TransactionChunk.from_rows(rows))
+
+    result = report.to_dict(max_groups=2)
+
+    assert result['truncated'] == {'by_account_pair': 5}
+    assert [group['destination_account'] for group in result['by_account_pair']] == ['acc_3', 'acc_4']
+
+def test_csv_chunks_are_bounded(tmp_path):
+    export = tmp_path / 'export.csv'
+    lines = ['transaction_id,source_account,destination_account,amount,currency,status,created_at']
+    lines += [f't{i},a,b,{i},INR,PROCESSED,2024-01-01T00:00:00Z' for i in range(5)]
+    export.write_text('\n'.join(lines) + '\n')
+
+    assert [len(chunk) for chunk in iter_csv_chunks(str(export), chunk_size=2)] == [2, 2, 1]
+
+def random_pairs(rng, size):
+    return [
+        np.array([f'acc_{i}' for i in rng.integers(0, 50, size)]),
+        np.array([f'acc_{i}' * int(w) for i, w in zip(rng.integers(0, 50, size), rng.integers(1, 4, size))])
+    ]
+
+def test_group_totals_merge_across_chunks_matches_a_plain_count():
+    rng = np.random.default_rng(7)
+    groups = GroupTotals()
+    expected = {}
+    for _ in range(5):
+        columns = random_pairs(rng, 400)
+        amount = rng.integers(1, 1000, 400).astype(np.int64)
+        groups.add(columns, amount)
+        for source, destination, value in zip(*columns, amount):
+            count, total = expected.get((source, destination), (0, 0))
+            expected[(source, destination)] = (count + 1, total + int(value))
+
+    result = {labels: (count, amount) for labels, count, amount in groups.largest()}
+
+    assert result == expected
+    assert list(result) == sorted(expected)
+    assert not groups.approximate
+
+def test_group_totals_survive_hash_collisions(monkeypatch):
+    monkeypatch.setattr(reports, 'hash_keys', lambda columns: np.zeros(len(columns[0]), dtype=np.uint64))
+    currency = np.array(['INR', 'USD', 'INR'])
+    hour = np.array(['2024-01-01T10', 'NaT', 'NaT'], dtype='datetime64[h]')
+
+    groups = {labels: (count, total) for labels, count, total in group_totals([currency, hour], np.array([1, 2, 3]))}
+
+    assert groups == {('INR', '2024-01-01T10'): (1, 1), ('INR', 'NaT'): (1, 3), ('USD', 'NaT'): (1, 2)}
+
+def test_group_totals_keep_only_the_largest_past_the_limit():
+    groups = GroupTotals(max_tracked=2)
+    groups.add([np.array(['a', 'b', 'c'])], np.array([5, 1, 9], dtype=np.int64))
+    groups.merge()
+    groups.add([np.array(['a', 'c'])], np.array([1, 1], dtype=np.int64))
+
+    assert list(groups.largest()) == [(('a',), 2, 6), (('c',), 2, 10)]
+    assert groups.approximate
@@ -0,0 +1,103 @@
+# tests/test_warmup.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app import cache, utils, warmup
+from app.cache import LRUCache
+from app.warmup import WarmUpManager, decode_snapshot, encode_snapshot
+from tests.conftest import make_transaction
+
+@pytest.fixture
+def caches(monkeypatch):
+    transaction_cache = LRUCache(10)
+    user_chart_cache = LRUCache(10)
+    monkeypatch.setattr(cache, "transaction_cache", transaction_cache)
+    monkeypatch.setattr(warmup, "transaction_cache", transaction_cache)
+    monkeypatch.setattr(warmup, "user_chart_cache", user_chart_cache)
+    monkeypatch.setattr(warmup.account_aggregates, "rebuild", lambda: {'accounts': 0})
+    return transaction_cache, user_chart_cache
+
+def test_snapshot_round_trip():
+    sections = {
+        "transactions": ["t1", "t2", "ü-unicode"],
+        "user_charts": ["a@example.com"],
+        "in_flight": []
+    }
+
+    decoded = decode_snapshot(encode_snapshot(sections, created_at=1700000000.5))
+
+    assert decoded == {**sections, "created_at": 1700000000.5}
+
+def test_snapshot_missing_sections_decode_empty():
+    assert decode_snapshot(encode_snapshot({}))["in_flight"] == []
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: b"",
+    lambda data: b"NOTWFW" + data[6:],
+    lambda data: data[:-4],
+    lambda data: data[:warmup.SNAPSHOT_HEADER.size] + b"garbage"
+])
+def test_corrupt_snapshots_are_rejected(corrupt):
+    with pytest.raises(ValueError):
+        decode_snapshot(corrupt(encode_snapshot({"transactions": ["t1"]})))
+
+def test_warm_up_caches_only_processed_rows(fake_db, caches, tmp_path):
+    transaction_cache, _ = caches
+    fake_db.tables['transactions'] = [
+        make_transaction('t1', status='PROCESSED'),
+        make_transaction('t2'),
+        make_transaction('t3')
+    ]
+    path = str(tmp_path / "warmup.snapshot")
+    with open(path, "wb") as f:
+        f.write(encode_snapshot({"transactions": ["t1", "t2"], "in_flight": ["t1", "t3"]}))
+
+    in_flight = WarmUpManager(path)._warm_caches()
+
+    assert transaction_cache.keys() == ["t1"]
+    assert in_flight == ["t2", "t3"]
+
+@pytest.mark.asyncio
+async def test_warm_up_resumes_processing_rows_missing_from_the_snapshot(fake_db, caches, tmp_path, monkeypatch):
+    resumed = []
+
+    async def process(transaction_id):
+        resumed.append(transaction_id)
+    monkeypatch.setattr(warmup, "process_transaction_in_background", process)
+    monkeypatch.setattr(warmup, "DB_PAGE_SIZE", 2)
+    monkeypatch.setattr(warmup, "processing_transactions", set())
+    # Accepted after the last snapshot was written
+    fake_db.tables['transactions'] = [make_transaction(f't{i}') for i in range(5)]
+    path = str(tmp_path / "warmup.snapshot")
+    with open(path, "wb") as f:
+        f.write(encode_snapshot({"in_flight": ["t0"]}))
+    manager = WarmUpManager(path)
+
+    await manager._run()
+    await asyncio.sleep(0)
+
+    assert sorted(resumed) == ['t0', 't1', 't2', 't3', 't4']
+    assert manager.summary["processing"] == 5
+    assert caches[0].keys() == []
+
+@pytest.mark.asyncio
+async def test_transaction_completes_once(fake_db, caches, monkeypatch):
+    transaction_cache, _ = caches
+    completed, notified = [], []
+
+    async def no_delay(seconds):
+        await asyncio.sleep(0)
+    monkeypatch.setattr(utils, "asyncio", SimpleNamespace(sleep=no_delay))
+    monkeypatch.setattr(utils.account_aggregates, "record_processed", completed.append)
+    monkeypatch.setattr(utils.notification_dispatcher, "enqueue", notified.append)
+    fake_db.tables['transactions'] = [make_transaction('t1')]
+
+    await asyncio.gather(
+        utils.process_transaction_in_background('t1'),
+        utils.process_transaction_in_background('t1')
+    )
+
+    assert [row['transaction_id'] for row in completed] == ['t1']
+    assert len(notified) == 1
+    assert transaction_cache.get('t1')['status'] == 'PROCESSED'
+    assert fake_db.tables['transactions'][0]['status'] == 'PROCESSED'